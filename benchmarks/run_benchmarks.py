@@ -0,0 +1,363 @@
+"""Performance benchmarks for Scribe's hot paths
+
+Drives the real Main.py functions under a virtual X display (Xvfb, so
+screen size and window manager never vary between runs) against generated
+documents, and writes the timings as JSON. With --baseline the results are
+compared against an earlier run, and the exit status is 1 if any metric got
+slower than the tolerance allows.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --sizes 1KB,1MB --baseline benchmarks/baseline.json
+
+All metrics are in milliseconds, so smaller is always better. Files of
+256 MB or more open in the read-only large file viewer, so the editing
+benchmarks (typing, replace) are skipped for them.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = "1KB,100KB,1MB,10MB,100MB,500MB"
+UNITS = {"KB": 1024, "MB": 1024 * 1024, "GB": 1024 * 1024 * 1024}
+SEED = 1234  # Same documents and the same random choices on every run
+
+Main = None  # The editor module, imported once the display is up
+
+
+def parse_size(text):
+    """Convert '10MB' into a number of bytes"""
+    text = text.strip().upper()
+    for unit, factor in UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * factor)
+    return int(text)
+
+
+def generate_document(path, size, rng):
+    """Write a Python-like text file of about size bytes"""
+    words = ["value", "result", "index", "buffer", "count", "offset", "line", "tab", "text", "widget"]
+    templates = ["def {0}_{1}({2}, {3}):", "    {0} = {1}.{2}({3})", "    return {0} + {1}", "",
+                 "    # {0} the {1} of the {2}", "class {0}{1}:", "    if {0} > {1}:", "        {0} += 1"]
+    lines = [templates[rng.randrange(len(templates))].format(*rng.sample(words, 4)) for _ in range(4000)]
+    block = "\n".join(lines) + "\n"
+    with open(path, "w", encoding="utf-8", newline="\n") as file:
+        written = 0
+        while written < size:
+            part = block[:size - written]
+            file.write(part)
+            written += len(part)
+
+
+def start_virtual_display():
+    """Start Xvfb on a free display number and point DISPLAY at it"""
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        sys.exit("Xvfb was not found - install it (e.g. apt install xvfb) or pass --use-display")
+    for number in range(99, 200):
+        if os.path.exists(f"/tmp/.X{number}-lock"):
+            continue  # Display already in use
+        process = subprocess.Popen([xvfb, f":{number}", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline and process.poll() is None:
+            if os.path.exists(f"/tmp/.X11-unix/X{number}"):
+                os.environ["DISPLAY"] = f":{number}"
+                return process
+            time.sleep(0.05)
+        process.kill()
+    sys.exit("Could not start Xvfb")
+
+
+def pump(predicate=lambda: True, timeout=600):
+    """Run the Tk event loop until predicate() is true"""
+    deadline = time.perf_counter() + timeout
+    while True:
+        Main.root.update()
+        if predicate():
+            return
+        if time.perf_counter() > deadline:
+            raise TimeoutError("Benchmark step did not finish in time")
+
+
+def settle():
+    """Process everything that is pending, including idle-time redraws"""
+    Main.root.update()
+    Main.root.update_idletasks()
+
+
+def close_all_tabs():
+    """Close every tab without prompting (an empty tab is left behind, as in the editor)"""
+    for tab_data in list(Main.tabs.values()):
+        tab_data.modified = False
+        Main.remove_tab(tab_data)
+    settle()
+
+
+def cancel_find_update():
+    """Drop a debounced find bar search so it doesn't run inside another measurement"""
+    if Main.find_after_id:
+        Main.root.after_cancel(Main.find_after_id)
+        Main.find_after_id = None
+
+
+def elapsed_ms(started):
+    """Milliseconds since a perf_counter() reading"""
+    return (time.perf_counter() - started) * 1000
+
+
+def summarize(samples, prefix, results):
+    """Store the median, 95th percentile and maximum of a list of samples"""
+    samples = sorted(samples)
+    results[f"{prefix}.p50_ms"] = round(statistics.median(samples), 3)
+    results[f"{prefix}.p95_ms"] = round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3)
+    results[f"{prefix}.max_ms"] = round(samples[-1], 3)
+
+
+def open_document(path):
+    """Open a file the way File > Open does; returns (tab, first screen ms, complete ms)"""
+    started = time.perf_counter()
+    tab_data = Main.tabs[Main.open_path(path)]
+    pump(lambda: tab_data.mapped or len(tab_data.document) > 0 or not tab_data.loader)
+    first_screen = elapsed_ms(started)
+    if tab_data.mapped:
+        pump(lambda: tab_data.mapped.index_complete)
+    else:
+        pump(lambda: not tab_data.loader)
+    complete = elapsed_ms(started)
+    settle()
+    return tab_data, first_screen, complete
+
+
+def bench_document(path, label, args, rng, results):
+    """Run the per-document benchmarks for one generated file"""
+    first_screens, completes = [], []
+    for _ in range(args.repeat):
+        close_all_tabs()
+        tab_data, first_screen, complete = open_document(path)
+        first_screens.append(first_screen)
+        completes.append(complete)
+    results[f"open.{label}.first_screen_ms"] = round(statistics.median(first_screens), 3)
+    results[f"open.{label}.complete_ms"] = round(statistics.median(completes), 3)
+    text_widget = tab_data.text_widget
+    line_count = tab_data.mapped.line_count() if tab_data.mapped else tab_data.document.line_count()
+
+    # Go to line
+    samples = []
+    for _ in range(args.samples):
+        line = rng.randint(1, line_count)
+        started = time.perf_counter()
+        Main.goto_line_in_tab(tab_data, line)
+        settle()
+        samples.append(elapsed_ms(started))
+    summarize(samples, f"goto_line.{label}", results)
+
+    # Find: the live count over the whole document, then stepping to the next match
+    Main.find_text()
+    Main.find_query_var.set("def")
+    cancel_find_update()
+    started = time.perf_counter()
+    Main.update_find_results()
+    settle()
+    results[f"find.{label}.count_ms"] = round(elapsed_ms(started), 3)
+    samples = []
+    for _ in range(args.samples):
+        started = time.perf_counter()
+        Main.find_next()
+        settle()
+        samples.append(elapsed_ms(started))
+    summarize(samples, f"find_next.{label}", results)
+
+    # Zoom and theme, which touch every open tab
+    started = time.perf_counter()
+    Main.zoom_in()
+    settle()
+    results[f"zoom_in.{label}.ms"] = round(elapsed_ms(started), 3)
+    Main.reset_zoom()
+    for theme in ("Dark", "Light"):
+        started = time.perf_counter()
+        Main.apply_theme(theme)
+        settle()
+        results[f"apply_theme.{label}.{theme.lower()}_ms"] = round(elapsed_ms(started), 3)
+
+    if not tab_data.mapped:
+        # Typing in the middle of the document, through Tk's own key bindings
+        Main.goto_line_in_tab(tab_data, max(1, line_count // 2))
+        text_widget.focus_force()
+        settle()
+        samples = []
+        for _ in range(args.keystrokes):
+            before = len(tab_data.document)
+            started = time.perf_counter()
+            text_widget.event_generate("<KeyPress>", keysym="a")
+            settle()
+            samples.append(elapsed_ms(started))
+            if len(tab_data.document) == before:
+                raise RuntimeError("Key events are not reaching the text widget (is the window focused?)")
+        summarize(samples, f"keystroke.{label}", results)
+
+        # Replace all, as one undoable step
+        Main.find_replace()
+        Main.find_query_var.set("def")
+        Main.replace_query_var.set("fn")
+        cancel_find_update()
+        started = time.perf_counter()
+        Main.replace_all()
+        settle()
+        results[f"replace_all.{label}.ms"] = round(elapsed_ms(started), 3)
+    cancel_find_update()
+    Main.hide_find_bar()
+    close_all_tabs()
+
+
+def bench_tab_switching(directory, args, rng, results):
+    """Open many small files and switch between them at random"""
+    close_all_tabs()
+    for number in range(args.tabs):
+        path = os.path.join(directory, f"tab_{number}.py")
+        generate_document(path, 20 * 1024, rng)
+        open_document(path)
+    tab_list = list(Main.tabs.values())
+    samples = []
+    for _ in range(args.samples * 5):
+        tab_data = rng.choice(tab_list)
+        started = time.perf_counter()
+        Main.notebook.select(tab_data.tab_frame)
+        settle()
+        samples.append(elapsed_ms(started))
+    summarize(samples, f"tab_switch.{args.tabs}_tabs", results)
+    close_all_tabs()
+
+
+def bench_startup(directory, args, results):
+    """Launch the editor with --startup-report a few times and keep the median of each phase"""
+    report_path = os.path.join(directory, "startup.json")
+    reports = []
+    for _ in range(args.launches):
+        status = subprocess.run([sys.executable, os.path.join(REPO_DIR, "Main.py"),
+                                 f"--startup-report={report_path}"], cwd=directory).returncode
+        if status == 2:  # 1 only means slower than the target, which the baseline comparison judges instead
+            sys.exit("The editor did not start - see its output above")
+        with open(report_path, "r", encoding="utf-8") as file:
+            reports.append(json.load(file))
+    results["startup.launch_to_ready_ms"] = round(statistics.median(r["launch_to_ready_ms"] for r in reports), 3)
+    for phase in ("first frame", "ready for input"):
+        results[f"startup.{phase.replace(' ', '_')}_ms"] = round(
+            statistics.median(r["phases_ms"][phase] for r in reports), 3)
+
+
+def compare(results, baseline, tolerance, floor_ms):
+    """Print each metric against the baseline; returns the names of the ones that regressed"""
+    regressions = []
+    print(f"\n{'metric':<45} {'baseline':>12} {'now':>12} {'change':>9}")
+    for name in sorted(baseline["metrics"]):
+        before = baseline["metrics"][name]
+        if name not in results:
+            print(f"{name:<45} {before:>12.3f} {'missing':>12}")
+            continue
+        now = results[name]
+        change = (now - before) / before * 100 if before else 0.0
+        regressed = now > max(before * (1 + tolerance), before + floor_ms)  # Ignore noise on tiny timings
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<45} {before:>12.3f} {now:>12.3f} {change:>+8.1f}%{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def get_commit():
+    """Return the git commit being measured, if the tree is a git checkout"""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """Parse the command line, run the benchmarks and compare them with the baseline"""
+    parser = argparse.ArgumentParser(description="Benchmark Scribe's hot paths under Xvfb")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"document sizes (default {DEFAULT_SIZES})")
+    parser.add_argument("--tabs", type=int, default=200, help="tabs open for the tab switching benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="opens per document (the median is kept)")
+    parser.add_argument("--samples", type=int, default=20, help="samples per go to line / find next benchmark")
+    parser.add_argument("--launches", type=int, default=5, help="editor start-ups timed (the median is kept)")
+    parser.add_argument("--keystrokes", type=int, default=200, help="keys typed per document")
+    parser.add_argument("--output", default="benchmark-results.json", help="where to write the results")
+    parser.add_argument("--baseline", help="earlier results to compare with (exit status 1 on regression)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--floor-ms", type=float, default=2.0, help="slowdowns smaller than this never fail")
+    parser.add_argument("--use-display", action="store_true", help="use $DISPLAY instead of starting Xvfb")
+    args = parser.parse_args()
+
+    global Main
+    xvfb = None if args.use_display else start_virtual_display()
+    work_dir = tempfile.mkdtemp(prefix="scribe-bench-")
+    os.environ["SCRIBE_CONFIG_DIR"] = os.path.join(work_dir, "config")  # Never touch the user's session
+    try:
+        sys.path.insert(0, REPO_DIR)
+        import Main  # Builds the window; the event loop is driven from here instead
+        Main.root.geometry("1024x768+0+0")
+        Main.root.deiconify()
+        settle()
+
+        rng = random.Random(SEED)
+        results = {}
+        print("Benchmarking start-up...", flush=True)
+        bench_startup(work_dir, args, results)
+        for label in args.sizes.split(","):
+            label = label.strip().upper()
+            path = os.path.join(work_dir, f"document_{label}.py")
+            generate_document(path, parse_size(label), rng)
+            print(f"Benchmarking {label}...", flush=True)
+            bench_document(path, label, args, rng, results)
+            os.remove(path)
+        print(f"Benchmarking switching between {args.tabs} tabs...", flush=True)
+        bench_tab_switching(work_dir, args, rng, results)
+
+        report = {
+            "meta": {
+                "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                "commit": get_commit(),
+                "python": platform.python_version(),
+                "tk": str(Main.root.tk.call("info", "patchlevel")),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "arguments": vars(args),
+            },
+            "metrics": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=1, sort_keys=True)
+        print(f"Wrote {len(results)} metrics to {args.output}")
+
+        if args.baseline:
+            with open(args.baseline, "r", encoding="utf-8") as file:
+                baseline = json.load(file)
+            regressions = compare(results, baseline, args.tolerance, args.floor_ms)
+            if regressions:
+                print(f"\nFAILED: {len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}:")
+                for name in regressions:
+                    print(f"  {name}")
+                return 1
+            print("\nNo regressions.")
+        return 0
+    finally:
+        if Main is not None:
+            Main.root.destroy()
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if xvfb:
+            xvfb.terminate()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
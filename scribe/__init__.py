@@ -0,0 +1 @@
+"""Support modules for the Scribe text editor that do not depend on Tkinter"""
@@ -0,0 +1,302 @@
+"""Batch find and replace for Scribe - the find bar's replace, applied to many files from the command line
+
+    python Main.py --batch "old_host" "new_host" "config/**/*.yaml"
+    python Main.py --batch --regex "port: (\\d+)" "port: 1\\1" deploy/ --dry-run > change.diff
+
+No window is created. Paths may be files, directories (walked like Find
+in Files, honoring .gitignore) or glob patterns ("**" matches any number
+of directories). Files are matched exactly as the editor's Replace does:
+the same pattern options, case matched exactly unless --ignore-case,
+empty matches never replaced, \\1 groups expanded in regex mode, and
+the encoding, compression and line endings of each file kept as the
+editor keeps them.
+
+A process pool works through the files. Each file is read as a stream,
+in blocks of whole lines, twice at most: once to count the matches, and
+only if there are any, again while the result is written to a temporary
+file that is renamed over the original. A match can't span two blocks,
+which only matters for multi-line regexes in files larger than
+BLOCK_CHARS. --dry-run writes nothing and prints a unified diff instead.
+"""
+
+import argparse
+import concurrent.futures
+import functools
+import glob
+import io
+import os
+import re
+import sys
+import time
+
+from scribe.file_format import detect_format, open_compressed
+from scribe.find_in_files import iter_files
+from scribe.saver import atomic_write
+from scribe.search import LineIndex, compile_pattern, plan_replacements
+
+BLOCK_CHARS = 4 * 1024 * 1024  # Characters of whole lines matched at a time (a file this small is one block)
+BINARY_SNIFF_CHARS = 8192  # Characters checked for NUL to decide a file is binary
+NEWLINES = {"\r\n": "\r\n", "\r": "\r", "\n": "\n", None: "\n"}  # Newline style read -> written back
+
+
+def expand_paths(patterns):
+    """Return the sorted files named by paths, directories and glob patterns, and the patterns matching none"""
+    paths = set()
+    unmatched = []
+    for pattern in patterns:
+        names = glob.glob(pattern, recursive=True) if any(char in pattern for char in "*?[") else [pattern]
+        found = False
+        for name in names:
+            if os.path.isdir(name):
+                for path in iter_files(name):
+                    paths.add(path)
+                    found = True
+            elif os.path.isfile(name):
+                paths.add(name)
+                found = True
+        if not found:
+            unmatched.append(pattern)
+    return sorted(paths), unmatched
+
+
+def read_blocks(file, block_chars=BLOCK_CHARS):
+    """Yield the text of an open text file in blocks that end at line ends"""
+    while True:
+        block = file.read(block_chars)
+        if not block:
+            return
+        if not block.endswith("\n"):
+            block += file.readline()  # Finish the line
+        yield block
+
+
+class TextReader:
+    """Opens a file the way the editor does (detected encoding and compression, universal newlines)"""
+
+    def __init__(self, path, encoding, compression):
+        self.raw = open(path, "rb")
+        self.binary = open_compressed(self.raw, compression)
+        self.file = io.TextIOWrapper(self.binary, encoding=encoding)
+
+    def __enter__(self):
+        return self.file
+
+    def __exit__(self, *exc_info):
+        self.file.detach()  # Leave closing to the binary streams
+        if self.binary is not self.raw:
+            self.binary.close()
+        self.raw.close()
+
+
+def count_matches(pattern, text):
+    """Return the number of non-empty matches in text"""
+    return sum(1 for match in pattern.finditer(text) if match.end() > match.start())
+
+
+def apply_edits(text, edits, start=0, end=None):
+    """Return text[start:end] with (start, end, new_text) edits inside that range applied"""
+    parts = []
+    position = start
+    for edit_start, edit_end, new_text in edits:
+        parts.append(text[position:edit_start])
+        parts.append(new_text)
+        position = edit_end
+    parts.append(text[position:len(text) if end is None else end])
+    return "".join(parts)
+
+
+def diff_lines(text):
+    """Split the text of whole lines into lines for a diff, noting whether the last one lacks a newline"""
+    if not text:
+        return [], False
+    if text.endswith("\n"):
+        return text[:-1].split("\n"), False
+    return text.split("\n"), True
+
+
+def block_hunks(block, edits, first_line, offset):
+    """Return unified diff hunks (zero context lines) for the edits of one block
+
+    first_line is the file's line number of the block's first line, and
+    offset how many lines earlier edits added (or removed). Returns the hunk
+    text and the new offset.
+    """
+    index = LineIndex(block)
+    groups = []  # [first line, last line, edits] of edits that touch the same lines
+    for edit in edits:
+        start_line = index.line_of(edit[0])
+        end_line = index.line_of(edit[1] - 1)
+        if block[edit[1] - 1] == "\n" and edit[1] < len(block):
+            end_line += 1  # The newline was replaced, so the next line joins this one
+        if groups and start_line <= groups[-1][1]:
+            groups[-1][1] = max(groups[-1][1], end_line)
+            groups[-1][2].append(edit)
+        else:
+            groups.append([start_line, end_line, [edit]])
+    out = []
+    for start_line, end_line, group in groups:
+        start = index.starts[start_line - 1]
+        end = index.starts[end_line] if end_line < index.line_count() else len(block)
+        old_lines, old_open = diff_lines(block[start:end])
+        new_lines, new_open = diff_lines(apply_edits(block, group, start, end))
+        old_start = first_line + start_line - 1
+        new_start = old_start + offset if new_lines else old_start + offset - 1  # An empty side names the line before
+        out.append(f"@@ -{old_start},{len(old_lines)} +{new_start},{len(new_lines)} @@\n")
+        out += [f"-{line}\n" for line in old_lines]
+        if old_open:
+            out.append("\\ No newline at end of file\n")
+        out += [f"+{line}\n" for line in new_lines]
+        if new_open:
+            out.append("\\ No newline at end of file\n")
+        offset += len(new_lines) - len(old_lines)
+    return "".join(out), offset
+
+
+def join_split_lines(pairs):
+    """Merge a (block, edits) pair into the next when its last edit removes the block's final newline
+
+    The line then continues in the next block, and a diff hunk must show it whole.
+    """
+    carried = None
+    for block, edits in pairs:
+        if carried:
+            shift = len(carried[0])
+            block, edits = carried[0] + block, carried[1] + [(start + shift, end + shift, text)
+                                                             for start, end, text in edits]
+            carried = None
+        if edits and edits[-1][1] == len(block) and not edits[-1][2].endswith("\n"):
+            carried = (block, edits)
+            continue
+        yield block, edits
+    if carried:
+        yield carried
+
+
+def replace_in_file(path, query, replacement, regex=False, case_sensitive=True, whole_word=False,
+                    dry_run=False):
+    """Worker process task - replace every match in one file (or, with dry_run, describe the change as a diff)
+
+    Returns a dict: path, replacements, bytes, diff (dry runs), skipped ("binary") and error.
+    """
+    result = {"path": path, "replacements": 0, "bytes": 0, "diff": None, "skipped": None, "error": None}
+    pattern = compile_pattern(query, regex, case_sensitive, whole_word)
+    try:
+        result["bytes"] = os.path.getsize(path)
+        encoding, compression = detect_format(path)
+        blocks = []  # Kept for the second pass while the file is a single block
+        with TextReader(path, encoding, compression) as file:
+            for number, block in enumerate(read_blocks(file)):
+                if number == 0 and "\0" in block[:BINARY_SNIFF_CHARS]:
+                    result["skipped"] = "binary"
+                    return result
+                result["replacements"] += count_matches(pattern, block)
+                if blocks is not None:
+                    blocks.append(block)
+                    if len(blocks) > 1:
+                        blocks = None  # Too large to keep - read it again
+            newline = file.newlines
+        if not result["replacements"]:
+            return result
+        newline = NEWLINES.get(newline, "\n")  # Mixed line endings are written back as \n, like the editor
+
+        def second_pass():
+            """Yield (block, edits) again, from memory or by reading the file once more"""
+            if blocks is not None:
+                for block in blocks:
+                    yield block, plan_replacements(pattern, block, replacement, regex)
+                return
+            with TextReader(path, encoding, compression) as again:
+                for block in read_blocks(again):
+                    yield block, plan_replacements(pattern, block, replacement, regex)
+
+        if dry_run:
+            parts = [f"--- a/{path}\n", f"+++ b/{path}\n"]
+            first_line = 1
+            offset = 0
+            for block, edits in join_split_lines(second_pass()):
+                if edits:
+                    hunks, offset = block_hunks(block, edits, first_line, offset)
+                    parts.append(hunks)
+                first_line += block.count("\n")
+            result["diff"] = "".join(parts)
+        else:
+            atomic_write(path, (apply_edits(block, edits) for block, edits in second_pass()), encoding, compression,
+                         newline)
+    except (OSError, UnicodeError, LookupError, EOFError) as e:
+        result["error"] = str(e) or type(e).__name__
+    return result
+
+
+def run_batch(paths, query, replacement, regex=False, case_sensitive=True, whole_word=False, dry_run=False,
+              workers=None):
+    """Yield the result of replace_in_file for each path, in order, spreading the files over a process pool"""
+    task = functools.partial(replace_in_file, query=query, replacement=replacement, regex=regex,
+                             case_sensitive=case_sensitive, whole_word=whole_word, dry_run=dry_run)
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        yield from map(task, paths)  # Not worth starting processes for
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(task, paths, chunksize=max(1, min(64, len(paths) // (workers * 4))))
+
+
+def main(argv=None):
+    """Command-line entry point (python Main.py --batch ...); returns the exit status"""
+    parser = argparse.ArgumentParser(prog="Main.py --batch",
+                                     description="Replace text in many files, with the editor's find and replace "
+                                                 "rules. Exit status: 0 done, 1 a file failed, 2 bad arguments.")
+    parser.add_argument("find", help="text (or with --regex, regular expression) to find")
+    parser.add_argument("replace", help="replacement text (may use \\1 and \\g<name> with --regex)")
+    parser.add_argument("paths", nargs="+", metavar="PATH",
+                        help="files, directories (searched like Find in Files) or glob patterns such as 'src/**/*.ini'")
+    parser.add_argument("--regex", action="store_true", help="treat FIND as a regular expression")
+    parser.add_argument("--ignore-case", action="store_true",
+                        help="ignore case (by default case is matched exactly, like the editor's Replace)")
+    parser.add_argument("--whole-word", action="store_true", help="only match whole words")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="change nothing; print a unified diff of what would change (counts go to stderr)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+    if not args.find:
+        parser.error("FIND must not be empty")
+    try:
+        pattern = compile_pattern(args.find, args.regex, not args.ignore_case, args.whole_word)
+    except re.error as e:
+        parser.error(f"invalid pattern: {e}")
+    if args.regex:
+        try:
+            pattern.sub(args.replace, "")  # Checks the group references before any file is touched
+        except re.error as e:
+            parser.error(f"invalid replacement: {e}")
+
+    report = sys.stderr if args.dry_run else sys.stdout  # A dry run's stdout is only the diff
+    paths, unmatched = expand_paths(args.paths)
+    for pattern in unmatched:
+        print(f"{pattern}: no files found", file=sys.stderr)
+    started = time.perf_counter()
+    changed = replacements = skipped = failed = total_bytes = 0
+    for result in run_batch(paths, args.find, args.replace, args.regex, not args.ignore_case, args.whole_word,
+                            args.dry_run, args.workers):
+        total_bytes += result["bytes"]
+        if result["error"]:
+            failed += 1
+            print(f"{result['path']}: error: {result['error']}", file=sys.stderr)
+        elif result["skipped"]:
+            skipped += 1
+        elif result["replacements"]:
+            changed += 1
+            replacements += result["replacements"]
+            if result["diff"]:
+                sys.stdout.write(result["diff"])
+            print(f"{result['path']}: {result['replacements']:,} replacement(s)", file=report)
+    seconds = time.perf_counter() - started
+    megabytes = total_bytes / (1024 * 1024)
+    rate = f"{megabytes / seconds:.1f} MB/s, {len(paths) / seconds:,.0f} files/s" if seconds > 0 else "-"
+    print(f"{len(paths):,} file(s) scanned, {changed:,} {'would change' if args.dry_run else 'changed'} "
+          f"({replacements:,} replacement(s)), {skipped:,} binary skipped, {failed:,} failed; "
+          f"{megabytes:.1f} MB in {seconds:.2f} s ({rate})", file=report)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
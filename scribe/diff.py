@@ -0,0 +1,224 @@
+"""Line diff for Scribe's compare view - patience diff over line hashes, with Myers for the gaps
+
+Each line is hashed to an integer once and the diff runs over those
+integer lists. Common leading and trailing lines are trimmed, then lines
+that occur exactly once on both sides are matched up as anchors (the
+longest increasing run of them, as in patience diff) and the gaps between
+anchors are diffed the same way. A gap without unique lines falls back to
+Myers' O(ND) algorithm; one that would cost more than MYERS_MAX_COST
+edits is reported as a single replaced block instead. Runs found equal by
+hash are compared as text before they are reported, so a hash collision
+shows up as a changed line rather than a wrong "equal".
+
+Opcodes are yielded in order, so a caller can show the start of the
+comparison while the rest is still being computed. They follow difflib's
+shape: (tag, a_start, a_end, b_start, b_end) with tag "equal", "replace",
+"delete" or "insert".
+"""
+
+import bisect
+from collections import Counter
+from itertools import compress
+
+MYERS_MAX_COST = 2000  # Most line edits Myers may spend on one gap before it is shown as a replaced block
+
+
+def split_lines(text):
+    """Split text into the lines the compare view shows (a final newline doesn't start an extra line)"""
+    lines = text.split("\n")
+    if len(lines) > 1 and lines[-1] == "":
+        lines.pop()
+    return lines
+
+
+def unique_anchors(a, b, a0, a1, b0, b1):
+    """Return the a and b indices of the lines unique to both ranges, in their longest order-preserving run"""
+    a_range, b_range = a[a0:a1], b[b0:b1]
+    unique = {line for line, count in Counter(a_range).items() if count == 1}
+    unique.intersection_update(line for line, count in Counter(b_range).items() if count == 1)
+    if not unique:
+        return [], []
+    # Built with map/filter/compress so the million-line case stays out of the interpreter loop
+    b_index = list(compress(range(b0, b1), map(unique.__contains__, b_range)))
+    b_positions = dict(zip(map(b.__getitem__, b_index), b_index))
+    a_index = list(compress(range(a0, a1), map(unique.__contains__, a_range)))
+    b_order = list(map(b_positions.__getitem__, map(a.__getitem__, a_index)))
+    if b_order == sorted(b_order):
+        return a_index, b_order  # Already in order - the usual case when most lines are unchanged
+    # Longest increasing subsequence of the b indices (patience sorting with back-pointers)
+    tops = []  # Smallest b index ending a run of each length
+    top_numbers = []  # Position in a_index of that run's last anchor
+    previous = [None] * len(b_order)
+    for number, j in enumerate(b_order):
+        length = bisect.bisect_left(tops, j)
+        if length:
+            previous[number] = top_numbers[length - 1]
+        if length == len(tops):
+            tops.append(j)
+            top_numbers.append(number)
+        else:
+            tops[length] = j
+            top_numbers[length] = number
+    numbers = []
+    number = top_numbers[-1]
+    while number is not None:
+        numbers.append(number)
+        number = previous[number]
+    numbers.reverse()
+    return [a_index[number] for number in numbers], [b_order[number] for number in numbers]
+
+
+def myers(a, b, a0, a1, b0, b1, max_cost=MYERS_MAX_COST):
+    """Return the opcodes of a shortest edit script for the ranges, or None if it costs more than max_cost"""
+    n, m = a1 - a0, b1 - b0
+    limit = min(n + m, max_cost)
+    offset = limit + 1
+    v = [0] * (2 * limit + 3)  # v[k + offset]: furthest x reached on diagonal k = x - y
+    trace = []
+    for d in range(limit + 1):
+        trace.append(v[:])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[k - 1 + offset] < v[k + 1 + offset]):
+                x = v[k + 1 + offset]  # Step down (insert)
+            else:
+                x = v[k - 1 + offset] + 1  # Step right (delete)
+            y = x - k
+            while x < n and y < m and a[a0 + x] == b[b0 + y]:
+                x += 1
+                y += 1
+            v[k + offset] = x
+            if x >= n and y >= m:
+                return _myers_opcodes(trace, offset, n, m, a0, b0)
+    return None
+
+
+def _myers_opcodes(trace, offset, x, y, a0, b0):
+    """Walk the Myers trace back from (x, y) and return its opcodes in order"""
+    steps = []  # Backwards: (tag, x, y) of each line, "equal", "delete" or "insert"
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[k - 1 + offset] < v[k + 1 + offset]):
+            previous_k = k + 1
+        else:
+            previous_k = k - 1
+        previous_x = v[previous_k + offset] if d else 0
+        previous_y = previous_x - previous_k if d else 0
+        while x > previous_x and y > previous_y:
+            x -= 1
+            y -= 1
+            steps.append(("equal", x, y))
+        if d:
+            if x == previous_x:
+                steps.append(("insert", x, y - 1))
+            else:
+                steps.append(("delete", x - 1, y))
+        x, y = previous_x, previous_y
+    opcodes = []
+    for tag, x, y in reversed(steps):
+        a_end = x + 1 if tag != "insert" else x
+        b_end = y + 1 if tag != "delete" else y
+        _append(opcodes, (tag, a0 + x, a0 + a_end, b0 + y, b0 + b_end))
+    return opcodes
+
+
+def _append(opcodes, opcode):
+    """Add an opcode to a list, merging it into the last one where they are adjacent"""
+    if opcodes:
+        merged = _merge(opcodes[-1], opcode)
+        if merged:
+            opcodes[-1] = merged
+            return
+    opcodes.append(opcode)
+
+
+def _merge(first, second):
+    """Return the single opcode covering two adjacent ones, or None if they don't combine"""
+    if first[2] != second[1] or first[4] != second[3]:
+        return None
+    if first[0] == second[0]:
+        return (first[0], first[1], second[2], first[3], second[4])
+    if first[0] != "equal" and second[0] != "equal":
+        return ("replace", first[1], second[2], first[3], second[4])
+    return None
+
+
+def _raw_opcodes(a, b, max_cost):
+    """Yield unmerged opcodes in order (an explicit stack, so deep inputs can't exhaust the recursion limit)"""
+    stack = [("range", 0, len(a), 0, len(b))]
+    while stack:
+        item = stack.pop()
+        if item[0] != "range":
+            yield item
+            continue
+        _, a0, a1, b0, b1 = item
+        start_a0, start_b0 = a0, b0
+        while a0 < a1 and b0 < b1 and a[a0] == b[b0]:
+            a0 += 1
+            b0 += 1
+        end_a1, end_b1 = a1, b1
+        while a1 > a0 and b1 > b0 and a[a1 - 1] == b[b1 - 1]:
+            a1 -= 1
+            b1 -= 1
+        if a0 > start_a0:
+            yield ("equal", start_a0, a0, start_b0, b0)
+        tasks = []  # In order; pushed reversed so they pop in order
+        if a0 == a1 and b0 < b1:
+            tasks.append(("insert", a0, a0, b0, b1))
+        elif b0 == b1 and a0 < a1:
+            tasks.append(("delete", a0, a1, b0, b0))
+        elif a0 < a1:
+            a_anchors, b_anchors = unique_anchors(a, b, a0, a1, b0, b1)
+            if a_anchors:
+                gap_a, gap_b = a0, b0
+                for i, j in zip(a_anchors, b_anchors):
+                    if i == gap_a and j == gap_b and tasks:
+                        tasks[-1] = ("equal", tasks[-1][1], i + 1, tasks[-1][3], j + 1)  # Consecutive anchors
+                    else:
+                        tasks.append(("range", gap_a, i, gap_b, j))
+                        tasks.append(("equal", i, i + 1, j, j + 1))
+                    gap_a, gap_b = i + 1, j + 1
+                tasks.append(("range", gap_a, a1, gap_b, b1))
+            else:
+                opcodes = myers(a, b, a0, a1, b0, b1, max_cost)
+                tasks += opcodes if opcodes is not None else [("replace", a0, a1, b0, b1)]
+        if a1 < end_a1:
+            tasks.append(("equal", a1, end_a1, b1, end_b1))
+        stack.extend(reversed(tasks))
+
+
+def diff_opcodes(a, b, max_cost=MYERS_MAX_COST):
+    """Yield the opcodes turning the line hashes a into b, in order, with adjacent ones merged"""
+    pending = None
+    for opcode in _raw_opcodes(a, b, max_cost):
+        if opcode[1] == opcode[2] and opcode[3] == opcode[4]:
+            continue  # An empty gap between anchors
+        if pending is not None:
+            merged = _merge(pending, opcode)
+            if merged:
+                pending = merged
+                continue
+            yield pending
+        pending = opcode
+    if pending is not None:
+        yield pending
+
+
+def diff_lines(a_lines, b_lines, max_cost=MYERS_MAX_COST):
+    """Yield the opcodes turning the list of lines a_lines into b_lines, in order"""
+    a = list(map(hash, a_lines))
+    b = list(map(hash, b_lines))
+    for opcode in diff_opcodes(a, b, max_cost):
+        tag, a0, a1, b0, b1 = opcode
+        if tag != "equal" or a_lines[a0:a1] == b_lines[b0:b1]:
+            yield opcode
+            continue
+        start = 0  # Two different lines share a hash - report the lines that differ as replaced
+        for offset in range(a1 - a0):
+            if a_lines[a0 + offset] != b_lines[b0 + offset]:
+                if offset > start:
+                    yield ("equal", a0 + start, a0 + offset, b0 + start, b0 + offset)
+                yield ("replace", a0 + offset, a0 + offset + 1, b0 + offset, b0 + offset + 1)
+                start = offset + 1
+        if start < a1 - a0:
+            yield ("equal", a0 + start, a1, b0 + start, b1)
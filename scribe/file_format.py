@@ -0,0 +1,103 @@
+"""File format detection for Scribe - transparent compression and encoding sniffing
+
+Compressed files are recognized by their magic bytes rather than their
+name, and are decompressed as a stream, never to a temporary file. The
+text encoding is guessed from the first block of (decompressed) data: a
+byte order mark wins, then UTF-16 if about every other byte is zero, then
+UTF-8 if the block is valid UTF-8, and finally Windows-1252 or Latin-1.
+"""
+
+import bz2
+import codecs
+import gzip
+import io
+import lzma
+import os
+
+SNIFF_BYTES = 64 * 1024  # Bytes looked at to guess the encoding
+
+COMPRESSIONS = {  # Name -> (magic bytes, file extension, function wrapping a binary file object)
+    "gzip": (b"\x1f\x8b", ".gz", lambda raw, mode: gzip.GzipFile(fileobj=raw, mode=mode)),
+    "bz2": (b"BZh", ".bz2", lambda raw, mode: bz2.BZ2File(raw, mode)),
+    "xz": (b"\xfd7zXZ\x00", ".xz", lambda raw, mode: lzma.LZMAFile(raw, mode)),
+}
+
+BYTE_ORDER_MARKS = (  # Longest first - the UTF-32 LE mark starts with the UTF-16 LE one
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def detect_compression(file_path):
+    """Return the compression of a file ("gzip", "bz2", "xz") from its magic bytes, or None"""
+    with open(file_path, "rb") as file:
+        head = file.read(8)
+    for name, (magic, _, _) in COMPRESSIONS.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def compression_for_path(file_path):
+    """Return the compression a new file should get from its extension, or None"""
+    extension = os.path.splitext(file_path)[1].lower()
+    for name, (_, compressed_extension, _) in COMPRESSIONS.items():
+        if extension == compressed_extension:
+            return name
+    return None
+
+
+def open_compressed(raw, compression, mode="rb"):
+    """Wrap a binary file object so it (de)compresses as a stream; uncompressed files are returned as is
+
+    Closing the wrapper finishes the compressed stream but leaves raw open.
+    """
+    if compression is None:
+        return raw
+    return COMPRESSIONS[compression][2](raw, mode)
+
+
+def sniff_encoding(data):
+    """Guess the text encoding of a block of bytes from the start of a file"""
+    for mark, encoding in BYTE_ORDER_MARKS:
+        if data.startswith(mark):
+            return encoding
+    if len(data) >= 2 and data.count(0) * 3 > len(data):  # Mostly ASCII text in 16-bit units
+        odd_zeros = data[1::2].count(0)
+        even_zeros = data[0::2].count(0)
+        return "utf-16-le" if odd_zeros > even_zeros else "utf-16-be"
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(data, final=False)  # A character cut off at the end is fine
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        data.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin-1"  # Decodes anything
+
+
+def detect_format(file_path):
+    """Return (encoding, compression) for a file, reading no more than its first block"""
+    compression = detect_compression(file_path)
+    with open(file_path, "rb") as raw, open_compressed(raw, compression) as binary:
+        head = binary.read(SNIFF_BYTES)
+    return sniff_encoding(head), compression
+
+
+def read_text(file_path, errors="strict"):
+    """Read a whole file the way the editor opens it; returns (text, size on disk, encoding, compression)
+
+    errors is passed to the decoder ("replace" shows undecodable bytes as U+FFFD instead of raising).
+    """
+    encoding, compression = detect_format(file_path)
+    with open(file_path, "rb") as raw, open_compressed(raw, compression) as binary:
+        file = io.TextIOWrapper(binary, encoding=encoding, errors=errors)  # Universal newlines, like the loader
+        text = file.read()
+        file.detach()  # Leave closing to the with statement
+        size = raw.tell()
+    return text, size, encoding, compression
@@ -0,0 +1,70 @@
+"""Background file reading for Scribe - files are decompressed and decoded on a worker thread in chunks"""
+
+import io
+import os
+import queue
+import threading
+
+from scribe.file_format import detect_format, open_compressed
+
+CHUNK_SIZE = 256 * 1024  # Number of characters decoded per chunk handed to the UI
+QUEUE_DEPTH = 8  # Chunks the reader may get ahead of the UI before it waits
+
+
+class FileLoader:
+    """Read a text file on a background thread and queue the decoded chunks for the UI"""
+
+    def __init__(self, file_path, encoding=None):
+        self.file_path = file_path  # File being read
+        sniffed_encoding, self.compression = detect_format(file_path)  # Compression is never guessed from the name
+        self.encoding = encoding or sniffed_encoding  # Text encoding used to decode the file
+        self.total_bytes = os.path.getsize(file_path)  # Size on disk (compressed, for compressed files), for progress
+        self.bytes_read = 0  # Bytes consumed so far (updated by the reader thread)
+        self.error = None  # Exception raised by the reader, if any
+        self.chunks = queue.Queue(maxsize=QUEUE_DEPTH)  # Bounded so memory stays flat on huge files
+        self.cancelled = threading.Event()  # Set to ask the reader thread to stop
+        self.thread = threading.Thread(target=self._run, daemon=True)  # Reader thread
+
+    def start(self):
+        """Start reading the file in the background"""
+        self.thread.start()
+
+    def cancel(self):
+        """Stop reading - chunks already queued are discarded"""
+        self.cancelled.set()
+
+    def progress(self):
+        """Return the fraction of the file read so far (0.0 - 1.0)"""
+        if self.total_bytes == 0:
+            return 1.0  # Empty files are complete immediately
+        return min(1.0, self.bytes_read / self.total_bytes)
+
+    def get_chunk(self):
+        """Return the next decoded chunk, None once the file is finished, or raise queue.Empty"""
+        return self.chunks.get_nowait()
+
+    def _put(self, item):
+        """Queue an item for the UI, giving up if the load is cancelled while waiting"""
+        while not self.cancelled.is_set():
+            try:
+                self.chunks.put(item, timeout=0.1)  # Wait for the UI to catch up
+                return
+            except queue.Full:
+                continue  # Check for cancellation and try again
+
+    def _run(self):
+        """Reader thread body - decode the file chunk by chunk"""
+        try:
+            with open(self.file_path, "rb") as raw, open_compressed(raw, self.compression) as binary:
+                file = io.TextIOWrapper(binary, encoding=self.encoding)  # Universal newlines, as before
+                while not self.cancelled.is_set():
+                    chunk = file.read(CHUNK_SIZE)  # Decompress and decode the next block of characters
+                    self.bytes_read = raw.tell()  # Position for progress (exact once the end is hit)
+                    if not chunk:
+                        break  # End of file
+                    self._put(chunk)
+                file.detach()  # The with statement closes the files
+        except Exception as e:
+            self.error = e  # Reported to the user by the UI thread
+        finally:
+            self._put(None)  # Tell the UI the load is over
@@ -0,0 +1,108 @@
+"""File watching for Scribe - cheap external-change detection and reading only appended data
+
+A FileWatch remembers what the editor last saw of a file: its stat
+signature and the bytes just before the offset the tab has read up to.
+Checking for changes is a single os.stat call while the signature is
+unchanged. When it does change, comparing the remembered bytes tells an
+append (a growing log) from a rewrite, and an append is read from the old
+offset on instead of reading the whole file again.
+"""
+
+import codecs
+import io
+import os
+
+FINGERPRINT_BYTES = 4096  # Bytes before the read offset compared to tell an append from a rewrite
+READ_LIMIT = 1024 * 1024  # Most bytes read_appended returns at once, so one call never blocks for long
+
+
+def stat_signature(file_path):
+    """Return (size, mtime_ns, inode) for a file, or None if it doesn't exist (or can't be read)"""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+class FileWatch:
+    """Tracks one file from a byte offset the tab has already read up to"""
+
+    def __init__(self, file_path, offset=None, encoding="utf-8"):
+        self.file_path = file_path
+        self.encoding = encoding
+        signature = stat_signature(file_path)
+        if offset is None:
+            offset = signature[0] if signature else 0  # The tab holds the whole file as it is now
+        self.offset = offset  # Bytes of the file the tab reflects
+        if signature and signature[0] != offset:
+            signature = None  # The file grew since it was read - let check() find out how
+        self.signature = signature  # Stat signature when the file was last looked at
+        self._fingerprint = self._read_fingerprint(offset)
+        self._decoder = self._new_decoder()
+
+    def _new_decoder(self):
+        """Return a decoder that carries split characters and \\r\\n pairs over from one read to the next"""
+        return io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(self.encoding)(errors="replace"),
+                                            translate=True)  # Universal newlines, like the loader
+
+    def _read_fingerprint(self, offset):
+        """Return the bytes just before offset, or None if they can't be read"""
+        start = max(0, offset - FINGERPRINT_BYTES)
+        try:
+            with open(self.file_path, "rb") as file:
+                file.seek(start)
+                data = file.read(offset - start)
+        except OSError:
+            return None
+        return data if len(data) == offset - start else None
+
+    def check(self):
+        """Return None if the file is unchanged, else "grown", "changed" or "deleted"
+
+        "grown" means data was only appended after the offset, so
+        read_appended can bring the tab up to date.
+        """
+        signature = stat_signature(self.file_path)
+        if signature == self.signature:
+            return None
+        if signature is None:
+            return "deleted"
+        size, _, inode = signature
+        if ((self.signature is None or inode == self.signature[2]) and size >= self.offset
+                and self._fingerprint is not None and self._read_fingerprint(self.offset) == self._fingerprint):
+            if size == self.offset:
+                self.signature = signature  # Only touched - nothing to read
+                return None
+            return "grown"
+        return "changed"
+
+    def acknowledge(self):
+        """Accept the file's current state without reading it (the user chose to keep their text)"""
+        self.signature = stat_signature(self.file_path)
+
+    def read_appended(self, limit=READ_LIMIT):
+        """Read and decode up to limit bytes appended after the offset and move the offset past them
+
+        Returns the decoded text ("" when there is nothing new). A character
+        or \\r\\n pair split by the limit is completed by the next call.
+        """
+        try:
+            with open(self.file_path, "rb") as file:
+                file.seek(self.offset)
+                data = file.read(limit)
+                at_end = not file.read(1)
+        except OSError:
+            return ""
+        self.offset += len(data)
+        if at_end:
+            self.signature = stat_signature(self.file_path)  # Caught up - quiet until the next change
+        self._fingerprint = self._read_fingerprint(self.offset)
+        return self._decoder.decode(data)
+
+    def restart(self, offset=0):
+        """Continue from another offset (a rotated or truncated log is followed from its start)"""
+        self.offset = offset
+        self.signature = None  # Whatever is on disk now counts as new
+        self._fingerprint = self._read_fingerprint(offset)
+        self._decoder = self._new_decoder()
@@ -0,0 +1,258 @@
+"""Find in Files for Scribe - scan a directory tree for a pattern using a pool of processes
+
+The editor runs this module as a helper process (python -m scribe.find_in_files)
+so the search never competes with the Tk thread, and so worker processes never
+re-import Main.py (which builds the whole window at import time). The helper
+reads its request as JSON on stdin and writes one JSON object per line to stdout:
+
+    {"type": "matches", "path": ..., "matches": [[line, column, text], ...]}
+    {"type": "progress", "files": ...}
+    {"type": "done", "files": ..., "matched_files": ..., "matches": ..., "seconds": ..., "truncated": ...}
+"""
+
+import json
+import os
+import re
+import sys
+import time
+
+from scribe.file_format import read_text
+from scribe.search import compile_pattern
+
+BATCH_SIZE = 64  # Files handed to a worker process per task
+MAX_FILE_SIZE = 64 * 1024 * 1024  # Larger files are skipped (open them in the large file viewer instead)
+MAX_LINE_PREVIEW = 200  # Characters of each matching line sent back for display
+MAX_MATCHES_PER_FILE = 1000  # Stop reporting a file after this many matches
+BINARY_SNIFF_CHARS = 8192  # Characters checked for NUL to decide a file is binary
+
+
+def glob_to_regex(pattern):
+    """Translate a .gitignore glob into a regular expression body"""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")  # Zero or more directories
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            parts.append(".*")  # Everything below this point
+            i += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                parts.append(re.escape(char))  # Unclosed bracket is a literal
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]  # Gitignore negates classes with ! rather than ^
+                parts.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return "".join(parts)
+
+
+class IgnoreRule:
+    """One line of a .gitignore file"""
+
+    def __init__(self, base_dir, line):
+        self.base_dir = base_dir  # Directory containing the .gitignore
+        self.negated = line.startswith("!")  # "!pattern" re-includes paths
+        if self.negated:
+            line = line[1:]
+        self.dir_only = line.endswith("/")  # "pattern/" only matches directories
+        line = line.rstrip("/")
+        self.anchored = "/" in line  # Patterns with a slash are relative to base_dir
+        self.regex = re.compile(glob_to_regex(line.lstrip("/")) + "$")
+
+    def matches(self, path, is_dir):
+        """Return True if this rule applies to an absolute path"""
+        if self.dir_only and not is_dir:
+            return False
+        if self.anchored:
+            relative = os.path.relpath(path, self.base_dir).replace(os.sep, "/")
+            return self.regex.match(relative) is not None
+        return self.regex.match(os.path.basename(path)) is not None
+
+
+def load_ignore_rules(directory):
+    """Read the rules of directory/.gitignore (an empty list if there is none)"""
+    rules = []
+    try:
+        with open(os.path.join(directory, ".gitignore"), "r", encoding="utf-8", errors="replace") as file:
+            for line in file:
+                line = line.rstrip("\n").rstrip()
+                if line and not line.startswith("#"):
+                    rules.append(IgnoreRule(directory, line.replace("\\#", "#")))
+    except OSError:
+        pass  # No .gitignore here
+    return rules
+
+
+def is_ignored(rules, path, is_dir):
+    """Apply gitignore rules in order - the last matching rule decides"""
+    ignored = False
+    for rule in rules:
+        if rule.matches(path, is_dir):
+            ignored = not rule.negated
+    return ignored
+
+
+def iter_files(root_dir, honor_gitignore=True):
+    """Yield the files below root_dir that are not ignored (directory symlinks are not followed)"""
+    stack = [(root_dir, load_ignore_rules(root_dir) if honor_gitignore else [])]
+    while stack:
+        directory, rules = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue  # Unreadable directory
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if not is_dir and not entry.is_file():
+                    continue  # Sockets, devices, broken links...
+            except OSError:
+                continue
+            if entry.name == ".git" or is_ignored(rules, entry.path, is_dir):
+                continue
+            if is_dir:
+                child_rules = rules + load_ignore_rules(entry.path) if honor_gitignore else rules
+                stack.append((entry.path, child_rules))
+            else:
+                yield entry.path
+
+
+def search_text(pattern, text, limit=MAX_MATCHES_PER_FILE):
+    """Return [line, column, line_text] for each match of pattern in text (lines numbered from 1)"""
+    results = []
+    line = 1
+    line_start = 0
+    position = 0  # Offset up to which newlines have been counted
+    for match in pattern.finditer(text):
+        start = match.start()
+        if match.end() == start:
+            continue  # Ignore empty matches, like the find bar does
+        newlines = text.count("\n", position, start)
+        if newlines:
+            line += newlines
+            line_start = text.rfind("\n", position, start) + 1
+        position = start
+        line_end = text.find("\n", start)
+        line_text = text[line_start:line_end if line_end != -1 else len(text)]
+        results.append([line, start - line_start, line_text[:MAX_LINE_PREVIEW]])
+        if len(results) >= limit:
+            break
+    return results
+
+
+def search_file_batch(paths, query, regex, case_sensitive, whole_word):
+    """Worker process task - search a batch of files, skipping binary and oversized ones
+
+    Files are read like the editor opens them (sniffed encoding, compressed files decompressed), so
+    matches and columns agree with what the editor shows.
+    """
+    pattern = compile_pattern(query, regex, case_sensitive, whole_word)
+    results = []
+    for path in paths:
+        try:
+            if os.path.getsize(path) > MAX_FILE_SIZE:
+                continue
+            text = read_text(path, errors="replace")[0]
+        except Exception:
+            continue  # Unreadable, or a corrupt compressed file (lzma raises its own error type)
+        if "\0" in text[:BINARY_SNIFF_CHARS]:
+            continue  # Binary file (UTF-16 text has no NULs once decoded)
+        matches = search_text(pattern, text)
+        if matches:
+            results.append((path, matches))
+    return len(paths), results
+
+
+def run_search(request, emit, max_matches=20000, workers=None):
+    """Search request["root"] with a process pool, calling emit(message) as results arrive"""
+    import concurrent.futures  # Only the helper process needs it - the editor imports this module for search_text
+    started = time.perf_counter()
+    excluded = {os.path.normcase(os.path.abspath(path)) for path in request.get("exclude", [])}
+    arguments = (request["query"], request.get("regex", False), request.get("case_sensitive", False),
+                 request.get("whole_word", False))
+    compile_pattern(*arguments)  # Raise a bad regex here rather than in every worker
+    files_searched = matched_files = total_matches = 0
+    truncated = False
+    workers = workers or os.cpu_count() or 1
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        batch = []
+        paths = iter_files(request["root"], request.get("gitignore", True))
+
+        def collect(done):
+            """Report finished batches; returns False once enough matches have been found"""
+            nonlocal files_searched, matched_files, total_matches
+            for future in done:
+                count, results = future.result()
+                files_searched += count
+                for path, matches in results:
+                    matched_files += 1
+                    total_matches += len(matches)
+                    emit({"type": "matches", "path": path, "matches": matches})
+            emit({"type": "progress", "files": files_searched})
+            return total_matches < max_matches
+
+        for path in paths:
+            if os.path.normcase(os.path.abspath(path)) in excluded:
+                continue  # Searched from the editor's unsaved buffer instead
+            batch.append(path)
+            if len(batch) < BATCH_SIZE:
+                continue
+            pending.add(pool.submit(search_file_batch, batch, *arguments))
+            batch = []
+            if len(pending) >= workers * 2:  # Don't walk further ahead than the workers can search
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                if not collect(done):
+                    truncated = True
+                    break
+        if batch and not truncated:
+            pending.add(pool.submit(search_file_batch, batch, *arguments))
+        if truncated:
+            for future in pending:
+                future.cancel()
+        else:
+            while pending:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                if not collect(done):
+                    truncated = True
+                    for future in pending:
+                        future.cancel()
+                    break
+
+    emit({"type": "done", "files": files_searched, "matched_files": matched_files, "matches": total_matches,
+          "seconds": round(time.perf_counter() - started, 3), "truncated": truncated})
+
+
+def main():
+    """Helper process entry point - read the request from stdin, stream results to stdout"""
+    request = json.load(sys.stdin)
+
+    def emit(message):
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()  # The editor shows results as soon as they arrive
+
+    try:
+        run_search(request, emit, request.get("max_matches", 20000))
+    except Exception as e:
+        emit({"type": "error", "message": str(e)})
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""Incremental syntax highlighting for Scribe - pluggable line lexers and a convergence-based engine
+
+A grammar turns one line into tokens, given the lexer state at the start of
+the line (for example "inside a triple-quoted string"), and returns the state
+at its end. The engine remembers the end state of every line, so after an
+edit only the edited lines are lexed again, plus the lines after them until
+the new end state matches the one recorded before the edit - from there on
+the old tokens are still right.
+"""
+
+import builtins
+import keyword
+import os
+import re
+
+TOKEN_KINDS = ("keyword", "builtin", "string", "comment", "number", "decorator", "definition")
+
+
+class Grammar:
+    """Base class for grammars; subclasses implement tokenize_line"""
+
+    name = "Plain text"
+    extensions = ()  # File extensions (with the dot, lower case) the grammar is used for
+    initial_state = None  # Lexer state at the start of a file - must compare equal to itself
+
+    def tokenize_line(self, line, state):
+        """Return ([(start, end, kind), ...], end_state) for one line without its newline"""
+        return [], state
+
+
+class PythonGrammar(Grammar):
+    """Python keywords, builtins, strings (including multi-line ones), comments, numbers and decorators"""
+
+    name = "Python"
+    extensions = (".py", ".pyw", ".pyi")
+    KEYWORDS = frozenset(keyword.kwlist + ["match", "case", "type"])  # Soft keywords too
+    BUILTINS = frozenset(name for name in dir(builtins) if not name.startswith("_"))
+    TOKEN = re.compile(r"""
+          (?P<comment>\#.*)
+        | (?P<triple>(?i:[rbuf]{0,2})(?:\"\"\"|'''))
+        | (?P<string>(?i:[rbuf]{0,2})(?:"(?:[^"\\]|\\.)*"?|'(?:[^'\\]|\\.)*'?))
+        | (?P<decorator>^\s*@[\w.]+)
+        | (?P<number>\b(?:0[xXoObB][\da-fA-F_]+|\d[\d_]*\.?[\d_]*(?:[eE][+-]?\d+)?[jJ]?)\b|\.\d[\d_]*\b)
+        | (?P<name>[^\W\d]\w*)
+    """, re.VERBOSE)
+    CLOSERS = {'"""': re.compile(r'(?:[^\\]|\\.)*?"""'), "'''": re.compile(r"(?:[^\\]|\\.)*?'''")}
+
+    def tokenize_line(self, line, state):
+        """Lex one line; the state is None or the quotes of the triple-quoted string still open"""
+        tokens = []
+        position = 0
+        if state:
+            close = self.CLOSERS[state].match(line)
+            if close is None:
+                return [(0, len(line), "string")] if line else [], state  # The whole line is inside the string
+            tokens.append((0, close.end(), "string"))
+            position = close.end()
+        define_next = False  # The name after "def" or "class" is a definition
+        while True:
+            match = self.TOKEN.search(line, position)
+            if match is None:
+                return tokens, None
+            kind = match.lastgroup
+            start, end = match.span()
+            if kind == "triple":
+                quotes = line[end - 3:end]
+                close = self.CLOSERS[quotes].match(line, end)
+                if close is None:
+                    tokens.append((start, len(line), "string"))
+                    return tokens, quotes  # The string continues on the next line
+                end = close.end()
+                kind = "string"
+            elif kind == "decorator":
+                start = line.index("@", start)
+            elif kind == "name":
+                word = match.group()
+                if define_next:
+                    kind = "definition"
+                elif word in self.KEYWORDS:
+                    kind = "keyword"
+                elif word in self.BUILTINS:
+                    kind = "builtin"
+                else:
+                    kind = None
+                define_next = word in ("def", "class")
+            if kind:
+                tokens.append((start, end, kind))
+            position = end
+
+
+GRAMMARS = [PythonGrammar()]  # Grammars picked by file extension, first match wins
+
+
+def register_grammar(grammar):
+    """Make a grammar available for the file extensions it lists"""
+    GRAMMARS.insert(0, grammar)  # Later registrations override the built-in ones
+
+
+def grammar_for_path(file_path):
+    """Return the grammar for a file, or None if none matches"""
+    if not file_path:
+        return None
+    extension = os.path.splitext(file_path)[1].lower()
+    for grammar in GRAMMARS:
+        if extension in grammar.extensions:
+            return grammar
+    return None
+
+
+_UNKNOWN = object()  # End state of a line that has not been lexed since it was inserted
+
+
+class Highlighter:
+    """Tracks which lines of a document have current tokens, and lexes the rest on request
+
+    Lines are numbered from 1. Lines 1..valid_lines are known to be highlighted
+    correctly. After an edit, lines past converge_line whose new end state
+    equals their recorded one mean every line up to resume_lines is still
+    correct too, so lexing can skip ahead.
+    """
+
+    def __init__(self, grammar):
+        self.grammar = grammar
+        self.end_states = []  # end_states[i] = lexer state at the end of line i + 1
+        self.valid_lines = 0
+        self.converge_line = 0
+        self.resume_lines = 0
+
+    def reset(self):
+        """Forget everything (the whole document was replaced)"""
+        self.end_states = []
+        self.valid_lines = self.converge_line = self.resume_lines = 0
+
+    def start_state(self, line):
+        """Return the recorded lexer state at the start of a line (possibly stale past valid_lines)"""
+        if line < 2 or line - 2 >= len(self.end_states) or self.end_states[line - 2] is _UNKNOWN:
+            return self.grammar.initial_state
+        return self.end_states[line - 2]
+
+    def lines_changed(self, first_line, removed, added):
+        """Record an edit that replaced `removed` lines from first_line with `added` lines"""
+        old_last = first_line + removed - 1  # Last line touched, in the old numbering
+        delta = added - removed
+        index = first_line - 1
+        if index <= len(self.end_states):  # States past the end of the list were never recorded
+            self.end_states[index:index + removed] = [_UNKNOWN] * added
+        known = max(self.valid_lines, self.resume_lines)  # Lines that were correct before the edit
+        if first_line > known:
+            return  # Edit is in a part that is still waiting to be lexed
+        if self.converge_line > old_last:
+            self.converge_line += delta
+        self.converge_line = max(self.converge_line, first_line + added - 1)
+        self.resume_lines = known + delta if known > old_last else 0
+        self.valid_lines = min(self.valid_lines, first_line - 1)
+
+    def advance(self, lines):
+        """Lex lines continuing the valid prefix; returns [(line, tokens)] for the lines lexed
+
+        Stops early when the state converges with the one from before an
+        edit, so fewer results than lines may come back.
+        """
+        results = []
+        line = self.valid_lines + 1
+        state = self.start_state(line)
+        end_states = self.end_states
+        for text in lines:
+            tokens, state = self.grammar.tokenize_line(text, state)
+            results.append((line, tokens))
+            index = line - 1
+            if index < len(end_states):
+                old_state = end_states[index]
+                end_states[index] = state
+            else:
+                old_state = _UNKNOWN
+                end_states.append(state)
+            self.valid_lines = line
+            if (line >= self.converge_line and self.resume_lines > line and old_state is not _UNKNOWN
+                    and old_state == state):
+                self.valid_lines = self.resume_lines  # Everything after this line is unchanged
+                self.resume_lines = 0
+                break
+            line += 1
+        if self.valid_lines >= self.resume_lines:
+            self.resume_lines = 0
+        return results
+
+    def tokenize_lines(self, first_line, lines):
+        """Lex lines provisionally from the best known state, without recording anything
+
+        Used to paint the visible lines at once when the valid prefix hasn't
+        reached them yet.
+        """
+        results = []
+        state = self.start_state(first_line)
+        for line, text in enumerate(lines, first_line):
+            tokens, state = self.grammar.tokenize_line(text, state)
+            results.append((line, tokens))
+        return results
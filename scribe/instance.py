@@ -0,0 +1,124 @@
+"""Single-instance support for Scribe - hand files to an editor that is already running
+
+The first editor listens on a Unix socket in the config directory. A later
+"python Main.py file.py:120" connects to it before building any window,
+sends every location from its command line as one JSON line, and exits as
+soon as the running editor acknowledges:
+
+    {"open": [[path, line or null], ...]}   ->   "ok"
+
+On platforms without Unix sockets every launch simply gets its own window.
+"""
+
+import json
+import os
+import re
+import socket
+import threading
+
+from scribe.session import CONFIG_DIR
+
+SOCKET_PATH = os.path.join(CONFIG_DIR, "instance.sock")
+CONNECT_TIMEOUT = 2.0  # Seconds to wait for a running editor to acknowledge
+LOCATION = re.compile(r"^(.*?):(\d+)(?::\d+)?$")  # path:line, or path:line:column as compilers print it
+
+
+def parse_locations(args, cwd=None):
+    """Turn command-line arguments into [absolute path, line or None] pairs"""
+    cwd = cwd or os.getcwd()
+    locations = []
+    for arg in args:
+        path, line = arg, None
+        match = LOCATION.match(arg)
+        if match and not os.path.exists(os.path.join(cwd, arg)):  # A file may really be called "notes:2"
+            path, line = match.group(1), int(match.group(2))
+        locations.append([os.path.abspath(os.path.join(cwd, path)), line])
+    return locations
+
+
+def send_to_running_instance(locations, path=SOCKET_PATH):
+    """Ask a running editor to open locations (and come to the front); returns False if none is running"""
+    if not hasattr(socket, "AF_UNIX"):
+        return False
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(CONNECT_TIMEOUT)
+            client.connect(path)
+            client.sendall((json.dumps({"open": locations}) + "\n").encode("utf-8"))
+            return client.makefile("r", encoding="utf-8").readline().strip() == "ok"
+    except OSError:
+        return False  # Nobody listening (or a stale socket file from a crash)
+
+
+def is_listening(path=SOCKET_PATH):
+    """Return True if an editor accepts connections on the socket"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(CONNECT_TIMEOUT)
+            client.connect(path)
+        return True
+    except OSError:
+        return False
+
+
+class InstanceServer:
+    """Listens for open requests from later launches; on_request(locations) is called on a server thread"""
+
+    def __init__(self, on_request, path=SOCKET_PATH):
+        self.on_request = on_request
+        self.path = path
+        self._socket = None
+
+    def start(self):
+        """Start listening; returns False if Unix sockets are unavailable or another editor is listening"""
+        if not hasattr(socket, "AF_UNIX"):
+            return False
+        if os.path.exists(self.path):
+            if is_listening(self.path):
+                return False  # Started at the same moment as another editor, which won
+            try:
+                os.remove(self.path)  # Left behind by an editor that crashed
+            except OSError:
+                return False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(self.path)
+            os.chmod(self.path, 0o600)  # Only this user may send files to open
+            server.listen(16)
+        except OSError:
+            return False
+        self._socket = server
+        threading.Thread(target=self._serve, args=(server,), daemon=True).start()
+        return True
+
+    def _serve(self, server):
+        """Server thread body - answer one request per connection"""
+        while True:
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                return  # Closed
+            with connection:
+                try:
+                    connection.settimeout(CONNECT_TIMEOUT)
+                    request = json.loads(connection.makefile("r", encoding="utf-8").readline())
+                    locations = [[str(path), int(line) if line else None] for path, line in request["open"]]
+                except (OSError, ValueError, KeyError, TypeError):
+                    continue  # Not a request from Scribe
+                self.on_request(locations)
+                try:
+                    connection.sendall(b"ok\n")
+                except OSError:
+                    pass  # The sender gave up waiting
+
+    def close(self):
+        """Stop listening and remove the socket file"""
+        if self._socket is None:
+            return
+        self._socket.close()
+        self._socket = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,253 @@
+"""Crash-recovery journal for Scribe - unsaved edits are appended to a per-tab file as they happen
+
+A journal starts from a base (the file as it was loaded, or a full copy of
+the text) followed by one JSON line per coalesced edit:
+
+    {"journal": 1, "path": ..., "size": ..., "mtime_ns": ...}   base is the file on disk
+    {"journal": 1, "path": ..., "text": ...}                    base is this text
+    {"i": offset, "t": text}                                    insert
+    {"d": [start, end]}                                         delete
+
+Only edits are written, so disk traffic follows the typing rate rather than
+the document size. When the edits outgrow the document, the journal is
+compacted into a single text base. After a crash, replaying the journals
+rebuilds every unsaved document. Journals belong to the editor that wrote
+them (see scribe.owner), so another editor started meanwhile leaves them alone.
+"""
+
+import json
+import os
+import queue
+import threading
+
+from scribe.file_format import read_text
+from scribe.owner import claim, orphaned_names, owned_name
+from scribe.piece_table import PieceTable
+from scribe.saver import atomic_write
+from scribe.session import CONFIG_DIR
+
+JOURNAL_DIR = os.path.join(CONFIG_DIR, "journal")
+JOURNAL_VERSION = 1
+COMPACT_MIN_BYTES = 1024 * 1024  # Journals smaller than this are never compacted
+
+
+class EditJournal:
+    """Collects the edits of one tab and turns them into writes for the JournalWriter"""
+
+    def __init__(self, file_path, get_document, directory=JOURNAL_DIR):
+        self.path = os.path.join(directory, owned_name(".journal"))  # The journal file
+        self.get_document = get_document  # Returns the tab's document (used for compaction)
+        self._pending = []  # Coalesced edits not handed to the writer yet
+        self._rewrite = None  # Full journal contents to write instead of appending, if set
+        self._written = 0  # Characters in the journal file (0 = no file yet)
+        self.restart(file_path)
+
+    def restart(self, file_path, base=None):
+        """Start over from the file on disk (after loading or saving it), or from a TextSnapshot base
+
+        Nothing is written until the first edit, so unedited tabs never
+        cost any I/O.
+        """
+        self.file_path = file_path
+        self._header = {"journal": JOURNAL_VERSION, "path": file_path}
+        self._base = base  # Snapshot written as the header text along with the first edit
+        if base is None:
+            try:
+                stat = os.stat(file_path)
+                self._header.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            except (OSError, TypeError):
+                self._header["text"] = ""  # Untitled, or nothing on disk yet - the edits start from empty text
+        self._pending = []
+        self._rewrite = None
+        if self._written:
+            self._rewrite = ""  # Drop the old journal file once the writer gets here
+
+    def record_insert(self, offset, text):
+        """Note an insert, merging it into the previous one when typing continues"""
+        last = self._pending[-1] if self._pending else None
+        if last and "i" in last and last["i"] + len(last["t"]) == offset:
+            last["t"] += text
+        else:
+            self._pending.append({"i": offset, "t": text})
+
+    def record_delete(self, start, end):
+        """Note a delete, merging runs of Backspace or Delete presses"""
+        if end <= start:
+            return
+        last = self._pending[-1] if self._pending else None
+        if last and "d" in last and last["d"][0] == end:  # Backspace
+            last["d"][0] = start
+        elif last and "d" in last and last["d"][0] == start:  # Delete key
+            last["d"][1] += end - start
+        else:
+            self._pending.append({"d": [start, end]})
+
+    def record_text(self, text):
+        """Replace the journal with a full copy of the text (when the edit itself isn't known)"""
+        header = {"journal": JOURNAL_VERSION, "path": self.file_path, "text": text}
+        self._base = None
+        self._pending = []
+        self._rewrite = json.dumps(header) + "\n"
+
+    def take_writes(self):
+        """Return the (action, path, data) tasks that bring the journal file up to date"""
+        if self._pending and self._written > COMPACT_MIN_BYTES:
+            document = self.get_document()
+            if self._written > len(document):
+                self.record_text(document.get_text())  # Edits outgrew the text - store the text instead
+        tasks = []
+        if self._rewrite is not None:
+            if self._rewrite:
+                tasks.append(("replace", self.path, self._rewrite))
+                self._written = len(self._rewrite)
+            else:
+                tasks.append(("delete", self.path, None))
+                self._written = 0
+            self._rewrite = None
+        if self._pending:
+            lines = [json.dumps(edit) + "\n" for edit in self._pending]
+            if not self._written:
+                if self._base is not None:
+                    self._header["text"] = self._base.get_text()
+                    self._base = None
+                lines.insert(0, json.dumps(self._header) + "\n")  # First edit creates the file
+            data = "".join(lines)
+            tasks.append(("append", self.path, data))
+            self._written += len(data)
+            self._pending = []
+        return tasks
+
+    def discard(self):
+        """Return the task that deletes the journal file (the edits are no longer wanted)"""
+        self._pending = []
+        self._rewrite = None
+        if not self._written:
+            return []
+        self._written = 0
+        return [("delete", self.path, None)]
+
+
+class JournalWriter:
+    """Background thread that performs journal writes in order"""
+
+    def __init__(self):
+        self._tasks = queue.Queue()
+        self.error = None  # Last write error, for the status bar
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, tasks):
+        """Queue writes produced by EditJournal.take_writes or discard"""
+        for task in tasks:
+            self._tasks.put(task)
+
+    def wait(self):
+        """Block until every queued write is on disk"""
+        self._tasks.join()
+
+    def _run(self):
+        """Writer thread body"""
+        while True:
+            action, path, data = self._tasks.get()
+            try:
+                if action == "append":
+                    claim(os.path.dirname(path))  # Locked before the first journal exists
+                    with open(path, "a", encoding="utf-8", newline="\n") as file:
+                        file.write(data)
+                        file.flush()
+                        os.fsync(file.fileno())  # Once a second at most, so cheap
+                elif action == "replace":
+                    claim(os.path.dirname(path))  # Locked before the first journal exists
+                    atomic_write(path, [data])
+                elif action == "delete":
+                    os.remove(path)
+            except OSError as e:
+                if action != "delete":
+                    self.error = e
+            finally:
+                self._tasks.task_done()
+
+
+def replay_journal(journal_path):
+    """Rebuild the text recorded in a journal file
+
+    Returns (file_path, text, conflict); conflict is True if the file on
+    disk changed since the journal started, so the edits were applied to a
+    different text than they were made on. Returns None for an unusable journal.
+    """
+    try:
+        with open(journal_path, "r", encoding="utf-8") as file:
+            lines = file.readlines()
+    except (OSError, UnicodeDecodeError):
+        return None
+    try:
+        header = json.loads(lines[0])
+    except (IndexError, ValueError):
+        return None
+    if not isinstance(header, dict) or header.get("journal") != JOURNAL_VERSION:
+        return None
+    file_path = header.get("path")
+    conflict = False
+    if "text" in header:
+        text = header["text"]
+    else:
+        try:
+            stat = os.stat(file_path)
+            conflict = (stat.st_size, stat.st_mtime_ns) != (header.get("size"), header.get("mtime_ns"))
+            text = read_text(file_path)[0]  # Decompressed and decoded the way the editor opened it
+        except Exception:
+            text, conflict = "", True  # Missing, unreadable or corrupt - replay onto empty text
+
+    document = PieceTable(text)  # O(log n) per edit, however many edits there are
+    for line in lines[1:]:
+        try:
+            edit = json.loads(line)
+        except ValueError:
+            break  # The crash cut the last line short
+        if "i" in edit:
+            document.insert(edit["i"], edit["t"])
+        elif "d" in edit:
+            document.delete(*edit["d"])
+    return file_path, document.get_text(), conflict
+
+
+def recover_journals(directory=JOURNAL_DIR):
+    """Return [(journal_path, file_path, text, conflict)] for every journal left by an editor no longer running"""
+    names = [name for name in orphaned_names(directory) if name.endswith(".journal")]
+    try:
+        names.sort(key=lambda name: os.path.getmtime(os.path.join(directory, name)))
+    except OSError:
+        return []
+    recovered = []
+    for name in names:
+        journal_path = os.path.join(directory, name)
+        result = replay_journal(journal_path)
+        if result is None:
+            continue
+        recovered.append((journal_path, *result))
+    return recovered
+
+
+def find_edit(old, new):
+    """Return (start, old_end, inserted) describing the single edit that turns old into new
+
+    Used when only the text before and after a change is known (Tk's own
+    undo). The common prefix and suffix are found with slice comparisons,
+    which run at C speed.
+    """
+    limit = min(len(old), len(new))
+    low, high = 0, limit  # Length of the common prefix lies in [low, high]
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[low:middle] == new[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = low
+    low, high = 0, limit - prefix  # Same for the common suffix, not overlapping the prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[len(old) - middle:len(old) - low] == new[len(new) - middle:len(new) - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return prefix, len(old) - low, new[prefix:len(new) - low]
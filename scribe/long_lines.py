@@ -0,0 +1,107 @@
+"""Long-line handling for Scribe - cutting pathological lines down as a file loads, and pretty-printing
+
+Tk lays out a line as a whole, so a line megabytes long (minified
+JavaScript, a JSON dump on one line) makes scrolling and cursor movement
+crawl. While a file streams in, LongLineFilter passes ordinary lines
+through untouched, but shows only the first LONG_LINE_LIMIT characters of
+a longer line, followed by a marker. The rest of the line is kept so it
+can be shown on demand, a slice at a time.
+"""
+
+import json
+
+LONG_LINE_LIMIT = 5000  # Characters of a line shown before the rest is held back
+MARKER_TAG = "long_line_more"  # Tag of every "more characters" marker
+
+
+def marker_text(hidden):
+    """Return the marker shown after a cut line"""
+    return f"  [... {hidden:,} more characters]"
+
+
+class LongLineFilter:
+    """Turns decoded chunks of a file into Text.insert arguments, cutting long lines down on the way
+
+    Every cut line gets a marker tagged MARKER_TAG and a tag of its own
+    ("long_line_<key>"); hidden[key] holds the rest of the line and how
+    much of it has been shown since.
+    """
+
+    def __init__(self, limit=LONG_LINE_LIMIT):
+        self.limit = limit
+        self.column = 0  # Characters of the current line passed through so far
+        self._rest = None  # Parts of the current line past the limit, while one is being cut
+        self.hidden = {}  # Key -> [text of a line past the limit, characters of it shown since]
+        self.truncated = False  # True once any line has been cut
+
+    def feed(self, chunk):
+        """Return the insert arguments (text, tags, text, tags...) for the next chunk of the file"""
+        pieces = chunk.split("\n")
+        if (self._rest is None and self.column + len(pieces[0]) <= self.limit
+                and max(map(len, pieces[1:]), default=0) <= self.limit):
+            self.column = self.column + len(pieces[0]) if len(pieces) == 1 else len(pieces[-1])
+            return [chunk, ()]  # No long line in this chunk - the usual case, all at C speed
+        args = []
+        shown = []  # Text to insert before the next marker
+        for number, piece in enumerate(pieces):
+            if number:  # The previous line ended
+                self._end_line(args, shown)
+                shown.append("\n")
+            if self._rest is not None:
+                self._rest.append(piece)
+            elif self.column + len(piece) <= self.limit:
+                shown.append(piece)
+                self.column += len(piece)
+            else:
+                room = self.limit - self.column
+                shown.append(piece[:room])
+                self.column = self.limit
+                self._rest = [piece[room:]]
+                self.truncated = True
+        if shown:
+            args += ["".join(shown), ()]
+        return args
+
+    def finish(self):
+        """Return the insert arguments that end the file (the marker of a cut last line)"""
+        args = []
+        self._end_line(args, [])
+        return args
+
+    def _end_line(self, args, shown):
+        """Close the current line, adding its marker to args if it was cut"""
+        if self._rest is not None:
+            rest = "".join(self._rest)
+            key = len(self.hidden)
+            self.hidden[key] = [rest, 0]
+            args += ["".join(shown), (), marker_text(len(rest)), (MARKER_TAG, f"long_line_{key}")]
+            shown.clear()
+            self._rest = None
+        self.column = 0
+
+    def take(self, key, count):
+        """Return (next count characters of a cut line, characters still hidden after them)"""
+        rest, position = self.hidden[key]
+        text = rest[position:position + count]
+        self.hidden[key][1] = position + len(text)
+        return text, len(rest) - position - len(text)
+
+
+def pretty_print(text):
+    """Return (kind, text) with JSON or XML laid out one element per line
+
+    Raises ValueError if the text is neither (or isn't well-formed).
+    """
+    stripped = text.lstrip()
+    if stripped.startswith(("{", "[")):
+        return "JSON", json.dumps(json.loads(text), indent=2, ensure_ascii=False) + "\n"
+    if stripped.startswith("<"):
+        import xml.dom.minidom  # Only needed here, so the editor doesn't load it at start-up
+        from xml.parsers.expat import ExpatError
+        try:
+            document = xml.dom.minidom.parseString(stripped)
+        except ExpatError as e:
+            raise ValueError(f"not well-formed XML ({e})")
+        lines = document.toprettyxml(indent="  ").splitlines()
+        return "XML", "\n".join(line for line in lines if line.strip()) + "\n"  # Drop old whitespace-only text
+    raise ValueError("the text is neither JSON nor XML")
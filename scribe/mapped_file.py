@@ -0,0 +1,121 @@
+"""Read-only, memory-mapped access to very large files with a sparse line index"""
+
+import bisect
+import mmap
+import os
+import threading
+
+INDEX_BLOCK_SIZE = 64 * 1024  # Bytes between line-index checkpoints
+MAX_WINDOW_BYTES = 16 * 1024 * 1024  # Most bytes read_lines will decode at once
+
+
+class MappedFile:
+    """Memory-map a file and index its lines in the background
+
+    Lines are numbered from 1, like Tk text indices. The index only stores
+    the number of newlines before every INDEX_BLOCK_SIZE bytes, so its size
+    stays small no matter how many lines the file has.
+    """
+
+    def __init__(self, file_path, encoding="utf-8"):
+        self.file_path = file_path  # File being viewed
+        self.encoding = encoding  # Encoding used to decode lines for display
+        self.size = os.path.getsize(file_path)  # File size in bytes
+        self._file = open(file_path, "rb")  # Kept open for the lifetime of the map
+        if self.size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)  # OS pages data in on demand
+        else:
+            self._map = b""  # Empty files cannot be mapped
+        self.block_lines = [0]  # block_lines[i] = newlines before byte i * INDEX_BLOCK_SIZE
+        self.index_complete = self.size == 0  # True once every block has been counted
+        self._closed = threading.Event()  # Set when the file is closed
+        self._thread = threading.Thread(target=self._build_index, daemon=True)  # Index builder
+
+    def start(self):
+        """Start building the line index in the background"""
+        self._thread.start()
+
+    def close(self):
+        """Stop indexing and release the map"""
+        self._closed.set()
+        if self._thread.is_alive():
+            self._thread.join()  # Never unmap while the indexer is reading
+        if self.size:
+            self._map.close()
+        self._file.close()
+
+    def index_progress(self):
+        """Return the fraction of the file indexed so far (0.0 - 1.0)"""
+        if self.index_complete:
+            return 1.0
+        return min(1.0, (len(self.block_lines) - 1) * INDEX_BLOCK_SIZE / self.size)
+
+    def line_count(self):
+        """Return the number of lines indexed so far (the total once indexing is complete)"""
+        return self.block_lines[-1] + 1  # The last line has no newline after it
+
+    def _build_index(self):
+        """Indexer thread body - count the newlines in each block"""
+        newlines = 0
+        offset = 0
+        try:
+            while offset < self.size and not self._closed.is_set():
+                end = min(offset + INDEX_BLOCK_SIZE, self.size)
+                newlines += self._map[offset:end].count(b"\n")  # Copying 64 KB is cheaper than find() per line
+                self.block_lines.append(newlines)  # Single append keeps readers consistent
+                offset = end
+            self.index_complete = offset >= self.size
+        except ValueError:
+            pass  # Map was closed underneath us
+
+    def line_start(self, line):
+        """Return the byte offset where a line starts, or None if it has not been indexed yet"""
+        if line <= 1:
+            return 0
+        target = line - 1  # Line N starts after the (N-1)th newline
+        block_lines = self.block_lines
+        block = bisect.bisect_left(block_lines, target) - 1  # Block containing that newline
+        if block + 1 >= len(block_lines):
+            return None  # Past the indexed part of the file
+        position = block * INDEX_BLOCK_SIZE
+        for _ in range(target - block_lines[block]):
+            position = self._map.find(b"\n", position) + 1  # Step over each newline in the block
+        return position
+
+    def offset_to_line(self, offset):
+        """Return the line number containing a byte offset, or None if not indexed yet"""
+        block = offset // INDEX_BLOCK_SIZE
+        if block >= len(self.block_lines):
+            return None
+        start = block * INDEX_BLOCK_SIZE
+        return self.block_lines[block] + self._map[start:offset].count(b"\n") + 1
+
+    def read_lines(self, first_line, count):
+        """Decode up to count lines starting at first_line, joined with newlines"""
+        start = self.line_start(first_line)
+        if start is None:
+            return ""
+        end = self.line_start(first_line + count)
+        if end is None:
+            end = self.size  # Window runs to the end of the file...
+            if not self.index_complete:
+                end = min(end, (len(self.block_lines) - 1) * INDEX_BLOCK_SIZE)  # ...or of the indexed part
+        end = max(start, min(end, start + MAX_WINDOW_BYTES))  # Keep pathological windows bounded
+        data = self._map[start:end]
+        if not self.index_complete and end < self.size:
+            data = data[:data.rfind(b"\n") + 1]  # Only show complete lines while indexing
+        if data.endswith(b"\n"):
+            data = data[:-2] if data.endswith(b"\r\n") else data[:-1]  # The widget supplies its own final newline
+        text = data.decode(self.encoding, errors="replace")
+        return text.replace("\r\n", "\n")
+
+    def decode_range(self, start, end):
+        """Decode the bytes between two offsets (used to turn byte columns into characters)"""
+        return self._map[start:end].decode(self.encoding, errors="replace")
+
+    def search(self, pattern, start=0):
+        """Return (start, end) byte offsets of the next match of a bytes regex, or None"""
+        match = pattern.search(self._map, start)  # re scans the map directly, no copy
+        if match is None:
+            return None
+        return match.start(), match.end()
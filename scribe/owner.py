@@ -0,0 +1,110 @@
+"""Per-process ownership of Scribe's scratch files - crash journals and spilled undo steps
+
+Several editors can run at once (--new-instance, or when the handoff to a
+running one fails) and share the journal and undo directories. Each of
+them puts its owner id in the names of the files it creates there, and
+holds an exclusive lock on "<owner id>.lock" in the same directory for as
+long as it runs. The operating system drops the lock when the process
+exits or crashes, so a file may be recovered or deleted by another editor
+only if it can take the lock of the file's owner.
+"""
+
+import os
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+OWNER_ID = uuid.uuid4().hex[:12]  # This process's owner id
+LOCK_SUFFIX = ".lock"
+
+_held = {}  # Lock file path -> open file, kept open (and locked) until the process exits
+
+
+def _try_lock(path):
+    """Open and exclusively lock a file without waiting; returns the open file, or None if it is held"""
+    try:
+        file = open(path, "a+b")
+    except OSError:
+        return None
+    try:
+        if fcntl:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        if not os.path.samestat(os.fstat(file.fileno()), os.stat(path)):
+            raise OSError("lock file was replaced")  # Removed by another editor between the open and the lock
+    except OSError:
+        file.close()
+        return None
+    return file
+
+
+def claim(directory):
+    """Create the directory and lock this process's owner file in it (once); returns directory
+
+    Call it before making owned files, so they never exist unlocked.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, OWNER_ID + LOCK_SUFFIX)
+    if path not in _held:
+        for _ in range(3):  # Another editor may remove a lock file it found unlocked in the same instant
+            file = _try_lock(path)
+            if file is not None:
+                _held[path] = file
+                break
+    return directory
+
+
+def owned_name(suffix):
+    """Return a new file name carrying this process's owner id"""
+    return f"{OWNER_ID}-{uuid.uuid4().hex}{suffix}"
+
+
+def owner_of(name):
+    """Return the owner id in a file name, or None for a name without one"""
+    owner, separator, _ = name.lstrip(".").partition("-")  # Temp files are ".<name>.<random>.tmp"
+    return owner if separator else None
+
+
+def orphaned_names(directory):
+    """Return the names in directory whose owner is no longer running (sorted), taking over their locks
+
+    A dead owner's lock stays held by this process until it exits, so no
+    other editor picks up the same files meanwhile. Files without an owner
+    id, left by older versions, count as orphaned; lock files nothing
+    refers to any more are removed.
+    """
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return []
+    files = {}  # Owner id (or None) -> names of its files
+    for name in names:
+        if not name.endswith(LOCK_SUFFIX):
+            files.setdefault(owner_of(name), []).append(name)
+    orphaned = files.pop(None, [])
+    files.pop(OWNER_ID, None)
+    for name in names:
+        owner = name[:-len(LOCK_SUFFIX)]
+        path = os.path.join(directory, name)
+        if not name.endswith(LOCK_SUFFIX) or owner == OWNER_ID or path in _held:
+            continue
+        file = _try_lock(path)
+        if file is None:
+            files.pop(owner, None)  # Still running - its files are its own
+        elif owner in files:
+            _held[path] = file
+        else:
+            file.close()
+            try:
+                os.remove(path)  # Nothing left of that run
+            except OSError:
+                pass
+    for owner_files in files.values():
+        orphaned += owner_files  # Their owners' locks are held by this process now (or were never made)
+    return sorted(orphaned)
@@ -0,0 +1,264 @@
+"""Piece-table document model for Scribe - the text of a tab, kept independently of Tk
+
+The text is never stored as one string. Each inserted run of text goes into
+an append-only buffer, and the document is a sequence of pieces (buffer,
+start, length) held in a persistent treap: every node also records the
+characters and newlines below it, so finding an offset or a line takes
+O(log n) steps. Edits build new nodes along one path instead of changing
+old ones, which makes a snapshot of the document a single reference.
+"""
+
+import bisect
+import itertools
+import random
+from array import array
+
+ADD_BUFFER_LIMIT = 64 * 1024  # Small inserts are appended to the last buffer until it reaches this size
+
+
+class _Node:
+    """One piece of the document plus the totals of its subtree"""
+
+    __slots__ = ("buffer", "start", "length", "newlines", "priority", "left", "right", "size", "lines")
+
+    def __init__(self, buffer, start, length, newlines, priority, left=None, right=None):
+        self.buffer = buffer  # Index into the table's buffers
+        self.start = start  # Offset of the piece in its buffer
+        self.length = length  # Characters in the piece
+        self.newlines = newlines  # Newlines in the piece
+        self.priority = priority  # Treap heap key - keeps the tree balanced on average
+        self.left = left
+        self.right = right
+        self.size = length + (left.size if left else 0) + (right.size if right else 0)  # Subtree characters
+        self.lines = newlines + (left.lines if left else 0) + (right.lines if right else 0)  # Subtree newlines
+
+
+def _with_children(node, left, right):
+    """Copy a node with new children (nodes are never modified once built)"""
+    return _Node(node.buffer, node.start, node.length, node.newlines, node.priority, left, right)
+
+
+def _merge(first, second):
+    """Join two trees, all of first's text before all of second's"""
+    if first is None:
+        return second
+    if second is None:
+        return first
+    if first.priority > second.priority:
+        return _with_children(first, first.left, _merge(first.right, second))
+    return _with_children(second, _merge(first, second.left), second.right)
+
+
+def _newline_positions(text):
+    """Return the offsets of every newline in text"""
+    line_lengths = map((1).__add__, map(len, text.split("\n")))  # +1 for each newline; all at C speed
+    positions = array("q", list(itertools.accumulate(line_lengths, initial=-1)))
+    del positions[0]  # The -1 seed
+    positions.pop()  # The last line has no newline after it
+    return positions
+
+
+class TextSnapshot:
+    """Read-only view of a document at one moment (what PieceTable.snapshot returns)
+
+    Offsets count characters from 0; lines are numbered from 1 and columns
+    from 0, like Tk text indices.
+    """
+
+    def __init__(self, root, buffers, newline_index):
+        self._root = root  # Top of the piece tree
+        self._buffers = buffers  # Shared, append-only list of buffer strings
+        self._newline_index = newline_index  # Buffer index -> newline offsets, built on demand
+
+    def __len__(self):
+        return self._root.size if self._root else 0
+
+    def line_count(self):
+        """Return the number of lines (an empty document has one)"""
+        return (self._root.lines if self._root else 0) + 1
+
+    def _newlines_of(self, buffer):
+        """Return the newline offsets of a buffer, building them on first use"""
+        positions = self._newline_index.get(buffer)
+        if positions is None:
+            positions = self._newline_index[buffer] = _newline_positions(self._buffers[buffer])
+        return positions
+
+    def _count_newlines(self, buffer, start, end):
+        """Count the newlines in buffer[start:end]"""
+        positions = self._newlines_of(buffer)
+        return bisect.bisect_left(positions, end) - bisect.bisect_left(positions, start)
+
+    def line_start(self, line):
+        """Return the offset of the first character of a line (clamped to the document)"""
+        target = min(line, self.line_count()) - 1  # Newlines before the line
+        if target <= 0:
+            return 0
+        node = self._root
+        base = 0
+        while node:
+            left_lines = node.left.lines if node.left else 0
+            if target <= left_lines:
+                node = node.left
+                continue
+            target -= left_lines
+            base += node.left.size if node.left else 0
+            if target <= node.newlines:
+                positions = self._newlines_of(node.buffer)
+                first = bisect.bisect_left(positions, node.start)  # First newline of this piece
+                return base + positions[first + target - 1] - node.start + 1
+            target -= node.newlines
+            base += node.length
+            node = node.right
+        return base
+
+    def line_length(self, line):
+        """Return the number of characters in a line, not counting its newline"""
+        end = self.line_start(line + 1) - 1 if line < self.line_count() else len(self)
+        return end - self.line_start(line)
+
+    def line_of(self, offset):
+        """Return the line containing an offset"""
+        newlines = 0
+        node = self._root
+        while node:
+            left_size = node.left.size if node.left else 0
+            if offset < left_size:
+                node = node.left
+                continue
+            newlines += node.left.lines if node.left else 0
+            offset -= left_size
+            if offset <= node.length:
+                return newlines + self._count_newlines(node.buffer, node.start, node.start + offset) + 1
+            newlines += node.newlines
+            offset -= node.length
+            node = node.right
+        return newlines + 1
+
+    def index_to_offset(self, index):
+        """Convert a Tk 'line.column' index into an offset (clamped to the document)"""
+        line, column = index.split(".")
+        line = int(line)
+        if line > self.line_count():
+            return len(self)  # Past the last line, like Tk's "end"
+        start = self.line_start(line)
+        line_end = self.line_start(line + 1) - 1 if line < self.line_count() else len(self)
+        return min(start + int(column), line_end)
+
+    def offset_to_index(self, offset):
+        """Convert an offset into a Tk 'line.column' index"""
+        offset = max(0, min(offset, len(self)))
+        line = self.line_of(offset)
+        return f"{line}.{offset - self.line_start(line)}"
+
+    def iter_chunks(self, start=0, end=None):
+        """Yield the text between two offsets piece by piece, without joining it"""
+        if end is None:
+            end = len(self)
+        stack = []
+        node = self._root
+        base = 0  # Document offset of the leftmost character of node's subtree
+        while stack or node:
+            while node:  # Walk left, skipping subtrees that end before start
+                left_size = node.left.size if node.left else 0
+                if base + left_size + node.length <= start:
+                    base += left_size + node.length
+                    node = node.right  # Everything up to and including this piece is before start
+                    continue
+                stack.append((node, base))
+                node = node.left
+            if not stack:
+                break
+            node, base = stack.pop()
+            piece_start = base + (node.left.size if node.left else 0)
+            if piece_start >= end:
+                break
+            first = max(start, piece_start) - piece_start
+            last = min(end, piece_start + node.length) - piece_start
+            if last > first:
+                yield self._buffers[node.buffer][node.start + first:node.start + last]
+            base = piece_start + node.length
+            node = node.right
+
+    def get_text(self, start=0, end=None):
+        """Return the text between two offsets as one string"""
+        return "".join(self.iter_chunks(start, end))
+
+
+class PieceTable(TextSnapshot):
+    """An editable document with O(log n) inserts, deletes and line lookups"""
+
+    def __init__(self, text=""):
+        super().__init__(None, [], {})
+        if text:
+            self.insert(0, text)
+
+    def snapshot(self):
+        """Return a read-only view of the current text - O(1), later edits don't affect it"""
+        return TextSnapshot(self._root, self._buffers, self._newline_index)
+
+    def _split(self, node, offset):
+        """Split a tree into the text before offset and the text from offset on"""
+        if node is None:
+            return None, None
+        left_size = node.left.size if node.left else 0
+        if offset <= left_size:
+            left, right = self._split(node.left, offset)
+            return left, _with_children(node, right, node.right)
+        if offset >= left_size + node.length:
+            left, right = self._split(node.right, offset - left_size - node.length)
+            return _with_children(node, node.left, left), right
+        cut = offset - left_size  # Offset falls inside this piece - split it in two
+        newlines = self._count_newlines(node.buffer, node.start, node.start + cut)
+        head = _Node(node.buffer, node.start, cut, newlines, random.random())
+        tail = _Node(node.buffer, node.start + cut, node.length - cut, node.newlines - newlines, random.random())
+        return _merge(node.left, head), _merge(tail, node.right)
+
+    def _extend_last(self, node, length, newlines):
+        """Lengthen the rightmost piece of a tree (path copy along the right spine)"""
+        if node.right:
+            return _with_children(node, node.left, self._extend_last(node.right, length, newlines))
+        return _Node(node.buffer, node.start, node.length + length, node.newlines + newlines, node.priority,
+                     node.left, None)
+
+    def insert(self, offset, text):
+        """Insert text at an offset (clamped to the document)"""
+        if not text:
+            return
+        offset = max(0, min(offset, len(self)))
+        before, after = self._split(self._root, offset)
+        newlines = text.count("\n")
+
+        last = self._rightmost(before)
+        buffers = self._buffers
+        if (last is not None and last.buffer == len(buffers) - 1 and len(text) < ADD_BUFFER_LIMIT
+                and last.start + last.length == len(buffers[-1])
+                and len(buffers[-1]) + len(text) <= ADD_BUFFER_LIMIT):
+            # Typing: grow the last buffer and the piece that ends with it instead of adding a piece
+            old_length = len(buffers[-1])
+            buffers[-1] += text  # Old pieces only cover the old prefix, so snapshots still read correctly
+            positions = self._newline_index.get(len(buffers) - 1)
+            if positions is not None and newlines:
+                positions.extend(old_length + position for position in _newline_positions(text))
+            before = self._extend_last(before, len(text), newlines)
+        else:
+            buffers.append(text)
+            before = _merge(before, _Node(len(buffers) - 1, 0, len(text), newlines, random.random()))
+        self._root = _merge(before, after)
+
+    def delete(self, start, end):
+        """Delete the text between two offsets"""
+        start = max(0, start)
+        end = min(end, len(self))
+        if end <= start:
+            return
+        before, rest = self._split(self._root, start)
+        _, after = self._split(rest, end - start)
+        self._root = _merge(before, after)
+
+    @staticmethod
+    def _rightmost(node):
+        """Return the last piece of a tree, or None for an empty tree"""
+        while node and node.right:
+            node = node.right
+        return node
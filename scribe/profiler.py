@@ -0,0 +1,145 @@
+"""Event handler profiling for Scribe - latency histograms, event-loop stalls and trace export
+
+The editor feeds this module one record per callback Tk makes into Python
+(key bindings, menu commands, after() timers...). Nothing here runs unless
+profiling has been switched on. Traces are written in Chrome's trace event
+format, which chrome://tracing, Perfetto and speedscope all open.
+"""
+
+import bisect
+import collections
+import json
+import os
+
+BUCKET_LIMITS_MS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)  # Histogram bucket tops
+MAX_TRACE_EVENTS = 200000  # Oldest events are dropped beyond this many
+MAX_STALLS = 1000  # Stalls kept for the report
+
+
+def unwrap_callback(func):
+    """Return the function a Tk callback really runs"""
+    if getattr(func, "__qualname__", "").endswith("after.<locals>.callit"):
+        # after() wraps every timer callback in a fresh closure - look at the function it calls instead
+        code = func.__code__
+        if "func" in code.co_freevars:
+            func = func.__closure__[code.co_freevars.index("func")].cell_contents
+    return getattr(func, "__func__", func)  # Bound methods
+
+
+def describe_callback(func):
+    """Return a readable name for an unwrapped callback (lambdas get their file and line)"""
+    code = getattr(func, "__code__", None)
+    name = getattr(func, "__qualname__", None) or repr(func)
+    if code is not None and name.endswith("<lambda>"):
+        return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return name
+
+
+class HandlerStats:
+    """Call count, total time and a latency histogram for one handler"""
+
+    def __init__(self, name):
+        self.name = name  # Handler name as shown in the report
+        self.count = 0  # Calls recorded
+        self.total_ms = 0.0  # Time spent in all calls
+        self.max_ms = 0.0  # Slowest single call
+        self.buckets = [0] * (len(BUCKET_LIMITS_MS) + 1)  # Calls per latency bucket (last one is open-ended)
+
+    def add(self, duration_ms):
+        """Record one call"""
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.buckets[bisect.bisect_left(BUCKET_LIMITS_MS, duration_ms)] += 1
+
+    @property
+    def mean_ms(self):
+        """Average call time"""
+        return self.total_ms / self.count if self.count else 0.0
+
+    def percentile(self, fraction):
+        """Estimate a percentile from the histogram (the top of the bucket it falls in)"""
+        wanted = fraction * self.count
+        seen = 0
+        for bucket, calls in enumerate(self.buckets):
+            seen += calls
+            if seen >= wanted and calls:
+                limit = BUCKET_LIMITS_MS[bucket] if bucket < len(BUCKET_LIMITS_MS) else self.max_ms
+                return min(limit, self.max_ms)
+        return self.max_ms
+
+
+class Profiler:
+    """Collects handler timings and event-loop stalls (times are time.perf_counter() readings)"""
+
+    def __init__(self):
+        self.ignored = set()  # Code objects of callbacks that should not be recorded
+        self._names = {}  # Code object -> handler name
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        self.handlers = {}  # Name -> HandlerStats
+        self.events = collections.deque(maxlen=MAX_TRACE_EVENTS)  # (name, start, end, category)
+        self.stalls = collections.deque(maxlen=MAX_STALLS)  # (start, end, slowest handler name)
+        self.origin = None  # Time of the first event, the zero of the trace
+        self._slowest = None  # (duration, name) of the slowest handler since the last stall check
+
+    def ignore(self, func):
+        """Never record a callback (the profiler's own timers)"""
+        self.ignored.add(unwrap_callback(func).__code__)
+
+    def record(self, func, start, end):
+        """Record one call of a callback"""
+        func = unwrap_callback(func)
+        code = getattr(func, "__code__", None)
+        if code is None:
+            name = describe_callback(func)
+        elif code in self.ignored:
+            return
+        else:
+            name = self._names.get(code)
+            if name is None:
+                name = self._names[code] = describe_callback(func)
+        if self.origin is None:
+            self.origin = start
+        duration_ms = (end - start) * 1000
+        stats = self.handlers.get(name)
+        if stats is None:
+            stats = self.handlers[name] = HandlerStats(name)
+        stats.add(duration_ms)
+        self.events.append((name, start, end, "handler"))
+        if self._slowest is None or duration_ms > self._slowest[0]:
+            self._slowest = (duration_ms, name)
+
+    def record_stall(self, start, end):
+        """Record a period in which the event loop could not run, blaming the slowest recent handler"""
+        if self.origin is None:
+            self.origin = start
+        culprit = self._slowest[1] if self._slowest else "(outside Python handlers)"
+        self.stalls.append((start, end, culprit))
+        self.events.append((f"Stall - {culprit}", start, end, "stall"))
+        self._slowest = None
+
+    def end_interval(self):
+        """Start a new stall-attribution interval (called when the event loop proved responsive)"""
+        self._slowest = None
+
+    def summary(self):
+        """Return the handler stats, most total time first"""
+        return sorted(self.handlers.values(), key=lambda stats: stats.total_ms, reverse=True)
+
+    def chrome_trace(self):
+        """Return the recorded events as a Chrome trace dictionary"""
+        origin = self.origin or 0.0
+        events = [{"name": name, "cat": category, "ph": "X", "pid": 1, "tid": 1 if category == "handler" else 2,
+                   "ts": round((start - origin) * 1e6, 1), "dur": round((end - start) * 1e6, 1)}
+                  for name, start, end, category in self.events]
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": "Tk handlers"}})
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": 2, "args": {"name": "Event loop stalls"}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path):
+        """Write the trace to a .json file"""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.chrome_trace(), file)
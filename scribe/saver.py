@@ -0,0 +1,77 @@
+"""Crash-safe file writing for Scribe - text goes to a temp file that is renamed over the target"""
+
+import codecs
+import os
+import shutil
+import uuid
+
+from scribe.file_format import open_compressed
+
+
+def atomic_write(file_path, chunks, encoding="utf-8", compression=None, newline=os.linesep):
+    """Write text chunks to file_path so a crash never leaves a half-written file
+
+    The chunks are written to a temporary file in the same directory
+    (compressed on the way if compression is given), flushed to disk, and
+    then renamed over the original in one step. Each "\n" in the chunks is
+    written as newline. Returns the number of bytes written.
+    """
+    target = os.path.realpath(file_path)  # Replace the file a symlink points at, not the link
+    directory = os.path.dirname(target)
+    temp_path = os.path.join(directory, f".{os.path.basename(target)}.{uuid.uuid4().hex[:8]}.tmp")
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    fd = os.open(temp_path, flags, 0o666)  # Same default permissions (after umask) as a normal open()
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            stream = open_compressed(raw, compression, "wb")
+            encoder = codecs.getincrementalencoder(encoding)()  # Starts with the byte order mark, if any
+            for chunk in chunks:
+                if newline != "\n":
+                    chunk = chunk.replace("\n", newline)  # Platform newlines unless told otherwise
+                stream.write(encoder.encode(chunk))
+            stream.write(encoder.encode("", final=True))
+            if stream is not raw:
+                stream.close()  # Ends the compressed stream
+            raw.flush()
+            os.fsync(raw.fileno())  # Data must be on disk before the rename makes it visible
+        try:
+            shutil.copymode(target, temp_path)  # Keep the original file's permissions
+        except FileNotFoundError:
+            pass  # New file - keep the default permissions
+        os.replace(temp_path, target)  # Atomic on POSIX and Windows
+    except BaseException:
+        try:
+            os.unlink(temp_path)  # Don't leave temp files behind on failure
+        except OSError:
+            pass
+        raise
+    fsync_directory(directory)
+    return os.path.getsize(target)
+
+
+def find_unencodable(chunks, encoding):
+    """Return the offset of the first character of the text chunks that encoding can't store, or None"""
+    offset = 0
+    for chunk in chunks:
+        try:
+            chunk.encode(encoding)
+        except UnicodeEncodeError as e:
+            return offset + e.start
+        offset += len(chunk)
+    return None
+
+
+def fsync_directory(directory):
+    """Flush a directory entry so a completed rename survives a crash (no-op where unsupported)"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return  # Windows has no directory handles to flush
+    try:
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass  # Some file systems refuse to fsync directories
+    finally:
+        os.close(fd)
@@ -0,0 +1,115 @@
+"""Text search for Scribe - one pass of Python's re over a snapshot of the buffer"""
+
+import bisect
+import itertools
+import re
+
+
+def compile_pattern(query, regex=False, case_sensitive=False, whole_word=False):
+    """Compile a Find query into a pattern (raises re.error for an invalid regex)
+
+    query may be str or bytes; bytes patterns are used to search memory-mapped files.
+    """
+    expression = query if regex else re.escape(query)
+    if whole_word:
+        if isinstance(query, bytes):
+            expression = rb"(?<!\w)(?:" + expression + rb")(?!\w)"
+        else:
+            expression = r"(?<!\w)(?:" + expression + r")(?!\w)"  # Works even if the query starts with a symbol
+    flags = re.MULTILINE  # ^ and $ match at every line, as users expect in an editor
+    if not case_sensitive:
+        flags |= re.IGNORECASE
+    return re.compile(expression, flags)
+
+
+def find_all(pattern, text, start=0, end=None):
+    """Return the (start, end) offsets of every non-empty match of pattern in text"""
+    if end is None:
+        end = len(text)
+    return [match.span() for match in pattern.finditer(text, start, end) if match.end() > match.start()]
+
+
+class LineIndex:
+    """Offsets of the start of every line, for converting string offsets to Tk indices"""
+
+    def __init__(self, text):
+        line_lengths = (len(line) + 1 for line in text.split("\n"))  # +1 for the newline itself
+        self.starts = [0]
+        self.starts.extend(itertools.accumulate(line_lengths))
+        self.starts.pop()  # The last value is past the end of the text
+
+    def line_count(self):
+        """Return the number of lines in the indexed text"""
+        return len(self.starts)
+
+    def to_index(self, offset):
+        """Convert a character offset into a Tk 'line.column' index"""
+        line = bisect.bisect_right(self.starts, offset)  # Lines are numbered from 1
+        return f"{line}.{offset - self.starts[line - 1]}"
+
+    def to_offset(self, index):
+        """Convert a Tk 'line.column' index into a character offset"""
+        line, column = index.split(".")
+        line = min(max(int(line), 1), len(self.starts))
+        return self.starts[line - 1] + int(column)
+
+    def line_of(self, offset):
+        """Return the line number containing a character offset"""
+        return bisect.bisect_right(self.starts, offset)
+
+
+class SearchSnapshot:
+    """A copy of a buffer taken at one edit generation, with a lazily built line index"""
+
+    def __init__(self, text, generation):
+        self.text = text  # Buffer contents
+        self.generation = generation  # Edit generation the copy was taken at
+        self._line_index = None
+
+    @property
+    def line_index(self):
+        """LineIndex for the snapshot, built on first use"""
+        if self._line_index is None:
+            self._line_index = LineIndex(self.text)
+        return self._line_index
+
+
+def matches_between(matches, start, end):
+    """Return the slice of a sorted match list that overlaps the offsets start..end"""
+    first = bisect.bisect_left(matches, (start,))  # Matches are (start, end) tuples sorted by start
+    if first > 0 and matches[first - 1][1] > start:
+        first -= 1  # Previous match runs into the range
+    last = bisect.bisect_left(matches, (end,))
+    return matches[first:last]
+
+
+def plan_replacements(pattern, text, replacement, expand=False, start=0, end=None):
+    """Return (start, end, new_text) for every match of pattern in text[start:end]
+
+    With expand=True the replacement may refer to capture groups (\\1, \\g<name>).
+    """
+    if end is None:
+        end = len(text)
+    edits = []
+    for match in pattern.finditer(text, start, end):
+        if match.end() == match.start():
+            continue  # Empty matches are never replaced (they are never highlighted either)
+        edits.append((match.start(), match.end(), match.expand(replacement) if expand else replacement))
+    return edits
+
+
+def group_replacements(edits, text, max_gap=256):
+    """Merge replacements separated by fewer than max_gap characters into single edits
+
+    Fewer, larger edits mean fewer round trips to Tk when applying them.
+    """
+    grouped = []
+    for start, end, new_text in edits:
+        if grouped and start - grouped[-1][1] < max_gap:
+            group_start, group_end, parts = grouped[-1]
+            parts.append(text[group_end:start])  # Keep the unchanged text between the matches
+            parts.append(new_text)
+            grouped[-1] = (group_start, end, parts)
+        else:
+            grouped.append((start, end, [new_text]))
+    return [(start, end, "".join(parts)) for start, end, parts in grouped]
@@ -0,0 +1,47 @@
+"""Session persistence for Scribe - the open files and view settings, saved as JSON between runs"""
+
+import json
+import os
+
+from scribe.saver import atomic_write
+
+SESSION_VERSION = 1  # Bumped when the file layout changes; other versions are ignored
+CONFIG_DIR = os.environ.get("SCRIBE_CONFIG_DIR", os.path.join(os.path.expanduser("~"), ".scribe"))
+SESSION_PATH = os.path.join(CONFIG_DIR, "session.json")
+
+
+def save_session(state, path=SESSION_PATH):
+    """Write a session dictionary atomically, so a crash mid-save keeps the previous session"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    state = dict(state, version=SESSION_VERSION)
+    atomic_write(path, [json.dumps(state, indent=1)])
+
+
+def load_session(path=SESSION_PATH):
+    """Return the saved session dictionary, or None if there is no usable session
+
+    The result always has "tabs" (a list of {"path", "cursor", "yview"}) and
+    "active" (an index into tabs, or None); "font_size" and "theme" are only
+    present if they were saved.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            state = json.load(file)
+    except (OSError, ValueError):
+        return None  # No session yet, or an unreadable one
+    if not isinstance(state, dict) or state.get("version") != SESSION_VERSION:
+        return None
+
+    tabs = []
+    for entry in state.get("tabs", []):
+        if not isinstance(entry, dict) or not isinstance(entry.get("path"), str):
+            continue  # Skip damaged entries rather than losing the whole session
+        tabs.append({
+            "path": entry["path"],
+            "cursor": entry.get("cursor") if isinstance(entry.get("cursor"), str) else "1.0",
+            "yview": entry.get("yview") if isinstance(entry.get("yview"), (int, float)) else 0.0,
+        })
+    state["tabs"] = tabs
+    active = state.get("active")
+    state["active"] = active if isinstance(active, int) and 0 <= active < len(tabs) else None
+    return state
@@ -0,0 +1,110 @@
+"""Start-up timing for Scribe - phase marks, lazily imported modules and the --startup-report tool
+
+"python Main.py --startup-report" starts a second editor under
+"python -X importtime", waits until it is ready for input (it quits by
+itself at that point, without touching the session or the journals) and
+prints how long each start-up phase took and which imports were slowest.
+The exit status is 1 if launch to ready took longer than STARTUP_TARGET_MS,
+so the report can guard against regressions in scripts.
+"""
+
+import importlib
+import json
+import sys
+import time
+
+STARTUP_TARGET_MS = 500  # Launch to ready for input, on a developer machine with an empty session
+REPORT_PREFIX = "scribe-startup: "  # Marks line the editor writes to stderr in report mode
+TOP_IMPORTS = 15  # Slowest imports listed in the report
+
+
+class LazyModule:
+    """Stands in for a module that is only imported when one of its attributes is first used"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+
+class StartupTimer:
+    """Milliseconds from the start of Main.py to each phase of start-up"""
+
+    def __init__(self, started):
+        self.started = started  # perf_counter() reading taken before Main.py imported anything
+        self.marks = []  # (phase, milliseconds since started)
+
+    def mark(self, phase):
+        """Note that a phase has just finished"""
+        self.marks.append((phase, (time.perf_counter() - self.started) * 1000))
+
+    def emit(self):
+        """Write the marks to stderr for the report tool"""
+        sys.stderr.write(REPORT_PREFIX + json.dumps(self.marks) + "\n")
+        sys.stderr.flush()
+
+
+def parse_importtime(lines):
+    """Return [(module, self us, cumulative us)] from "python -X importtime" output"""
+    imports = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            imports.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+        except (IndexError, ValueError):
+            continue  # The header line
+    return imports
+
+
+def run_startup_report(script, args, output=None):
+    """Start the editor in report mode and print (or write as JSON to output) its start-up timings
+
+    Returns the exit status: 0 within STARTUP_TARGET_MS, 1 over it, 2 if
+    the editor never became ready.
+    """
+    import subprocess  # Not at the top - Main.py imports this module on every start-up
+    command = [sys.executable, "-X", "importtime", script, "--new-instance", "--startup-child", *args]
+    launched = time.perf_counter()
+    process = subprocess.Popen(command, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
+    import_lines = []
+    marks = None
+    launch_to_ready = None
+    for line in process.stderr:
+        if line.startswith(REPORT_PREFIX):
+            launch_to_ready = (time.perf_counter() - launched) * 1000
+            marks = json.loads(line[len(REPORT_PREFIX):])
+        elif line.startswith("import time:"):
+            import_lines.append(line)
+        else:
+            sys.stderr.write(line)  # Real errors still show
+    process.wait()
+    if marks is None:
+        print("The editor exited before it was ready for input", file=sys.stderr)
+        return 2
+    imports = parse_importtime(import_lines)
+    slowest = sorted(imports, key=lambda item: item[2], reverse=True)[:TOP_IMPORTS]
+    passed = launch_to_ready <= STARTUP_TARGET_MS
+    if output:
+        with open(output, "w", encoding="utf-8") as file:
+            json.dump({"launch_to_ready_ms": round(launch_to_ready, 3), "target_ms": STARTUP_TARGET_MS,
+                       "phases_ms": {phase: round(ms, 3) for phase, ms in marks},
+                       "imports_us": {name: cumulative for name, _, cumulative in slowest}}, file, indent=1)
+        return 0 if passed else 1
+    print(f"Launch to ready for input: {launch_to_ready:.0f} ms "
+          f"(target {STARTUP_TARGET_MS} ms - {'OK' if passed else 'OVER TARGET'})")
+    print("\nPhases (ms since Main.py started; -X importtime slows imports down a little):")
+    previous = 0.0
+    for phase, ms in marks:
+        print(f"  {phase:<28} {ms:8.1f}   (+{ms - previous:.1f})")
+        previous = ms
+    print(f"\nSlowest imports ({len(imports)} modules, {sum(item[1] for item in imports) / 1000:.1f} ms in all):")
+    print(f"  {'module':<40} {'self ms':>8} {'cumulative ms':>14}")
+    for name, self_us, cumulative_us in slowest:
+        print(f"  {name.strip():<40} {self_us / 1000:8.1f} {cumulative_us / 1000:14.1f}")
+    return 0 if passed else 1
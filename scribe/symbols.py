@@ -0,0 +1,204 @@
+"""Symbol index for Scribe - the classes and functions of Python files, for Go to Symbol and the outline
+
+The editor runs this module as a long-lived helper process (python -m
+scribe.symbols) so parsing never happens on the Tk thread. Each request is
+one JSON line on stdin, and each answer one JSON line on stdout:
+
+    {"id": ..., "path": ...}                  index the file on disk (cached by path, size and mtime)
+    {"id": ..., "path": ..., "text": ...}     index unsaved text of that file
+    {"id": ..., "path": ..., "symbols": [[line, depth, kind, name, container], ...], "seconds": ...}
+    {"id": ..., "path": ..., "error": ...}
+
+Files are indexed incrementally: the source is split where top-level
+definitions start, and a block that is unchanged since the last request
+for the same file is not parsed again. A block with a syntax error (the
+user is halfway through typing) falls back to a line scan, so the rest of
+the file keeps its exact symbols.
+"""
+
+import ast
+import json
+import os
+import re
+import sys
+import time
+
+from scribe.file_format import read_text
+
+BLOCK_START = re.compile(r"(?:@|def\s|class\s|async\s+def\s)")  # Top-level lines that start a new block
+DEFINITION_LINE = re.compile(r"^([ \t]*)(async\s+def|def|class)\s+(\w+)", re.MULTILINE)  # Line scan fallback
+SCOPE_TYPES = (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+def split_blocks(source):
+    """Split source into (first line, text) blocks that each start with a top-level definition"""
+    lines = source.splitlines(keepends=True)
+    blocks = []
+    start = 0
+    in_decorators = False  # A decorator and the definition below it belong together
+    for number, line in enumerate(lines):
+        if BLOCK_START.match(line):
+            if not in_decorators and number > start:
+                blocks.append((start + 1, "".join(lines[start:number])))
+                start = number
+            in_decorators = line.startswith("@")
+        elif line.strip():
+            in_decorators = False
+    if start < len(lines) or not blocks:
+        blocks.append((start + 1, "".join(lines[start:])))
+    return blocks
+
+
+def symbols_from_tree(tree, first_line=1):
+    """Return [line, depth, kind, name, container] for every class and function in a parsed module"""
+    symbols = []
+
+    def visit(node, depth, container, in_class):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, SCOPE_TYPES):
+                if isinstance(child, ast.ClassDef):
+                    kind = "class"
+                else:
+                    kind = "method" if in_class else "function"
+                symbols.append([child.lineno + first_line - 1, depth, kind, child.name, container])
+                name = f"{container}.{child.name}" if container else child.name
+                visit(child, depth + 1, name, isinstance(child, ast.ClassDef))
+            elif isinstance(child, (ast.stmt, ast.excepthandler)) or type(child).__name__ == "match_case":
+                visit(child, depth, container, in_class)  # Definitions inside if/try/with blocks
+
+    visit(tree, 0, "", False)
+    return symbols
+
+
+def scan_symbols(source, first_line=1):
+    """Return symbols found by matching definition lines - for text that doesn't parse"""
+    symbols = []
+    scopes = []  # (indent, name, is class) of the enclosing definitions
+    for match in DEFINITION_LINE.finditer(source):
+        indent = len(match.group(1).expandtabs())
+        while scopes and scopes[-1][0] >= indent:
+            scopes.pop()
+        line = source.count("\n", 0, match.start()) + first_line
+        if match.group(2) == "class":
+            kind = "class"
+        else:
+            kind = "method" if scopes and scopes[-1][2] else "function"
+        container = ".".join(scope[1] for scope in scopes)
+        symbols.append([line, len(scopes), kind, match.group(3), container])
+        scopes.append((indent, match.group(3), kind == "class"))
+    return symbols
+
+
+class SymbolIndexer:
+    """Indexes files, reusing the blocks and files that haven't changed since they were last indexed"""
+
+    def __init__(self):
+        self.files = {}  # Path -> (size, mtime_ns, symbols) of the file on disk
+        self.blocks = {}  # Path -> {block text: symbols relative to the block's first line}
+
+    def index_file(self, path):
+        """Return the symbols of a file on disk, parsing it only if it changed since the last call"""
+        stat = os.stat(path)
+        cached = self.files.get(path)
+        if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+        symbols = self.index_text(path, read_text(path)[0])
+        self.files[path] = (stat.st_size, stat.st_mtime_ns, symbols)
+        return symbols
+
+    def index_text(self, path, source):
+        """Return the symbols of source, parsing only the blocks that changed since the last call for path"""
+        old_blocks = self.blocks.get(path, {})
+        new_blocks = {}
+        symbols = []
+        failed = []  # (first line, text) of blocks that don't parse on their own
+        for first_line, text in split_blocks(source):
+            block_symbols = old_blocks.get(text)
+            if block_symbols is None:
+                try:
+                    block_symbols = symbols_from_tree(ast.parse(text))
+                except (SyntaxError, ValueError):
+                    failed.append((first_line, text))
+                    continue
+            new_blocks[text] = block_symbols
+            symbols += [[line + first_line - 1, *rest] for line, *rest in block_symbols]
+        if failed:
+            try:
+                symbols = symbols_from_tree(ast.parse(source))  # The split was wrong (e.g. "def" inside a string)
+            except (SyntaxError, ValueError):
+                for first_line, text in failed:  # Really broken - scan those blocks line by line
+                    symbols += scan_symbols(text, first_line)
+                symbols.sort()
+        self.blocks[path] = new_blocks  # Only the latest version's blocks are kept
+        return symbols
+
+
+def fuzzy_score(query, name):
+    """Score how well a lower-case query matches a name as a subsequence (None if it doesn't)
+
+    Matches at the start of the name, at word starts (after _ or . or at a
+    capital) and runs of consecutive characters score higher; shorter names
+    win ties.
+    """
+    lower = name.lower()
+    position = 0
+    score = 0
+    previous = -2
+    for char in query:
+        found = lower.find(char, position)
+        if found == -1:
+            return None
+        if found == 0:
+            score += 10
+        elif name[found - 1] in "_." or (name[found].isupper() and name[found - 1].islower()):
+            score += 6
+        if found == previous + 1:
+            score += 4
+        previous = found
+        position = found + 1
+    return score * 100 - len(name)
+
+
+def fuzzy_filter(query, symbols, limit=200):
+    """Return the symbols whose qualified name matches query, best matches first"""
+    query = query.lower().replace(" ", "")
+    if not query:
+        return symbols[:limit]
+    scored = []
+    for symbol in symbols:
+        name = f"{symbol[4]}.{symbol[3]}" if symbol[4] else symbol[3]
+        score = fuzzy_score(query, symbol[3])  # The name itself first, so "init" finds every __init__
+        if score is None:
+            score = fuzzy_score(query, name)
+            if score is None:
+                continue
+            score -= 1000  # Matching across the container ranks lower
+        scored.append((-score, symbol[0], symbol))
+    scored.sort(key=lambda item: item[:2])
+    return [item[2] for item in scored[:limit]]
+
+
+def main():
+    """Helper process entry point - answer one request per line until stdin closes"""
+    indexer = SymbolIndexer()
+    for line in sys.stdin:
+        try:
+            request = json.loads(line)
+        except ValueError:
+            continue
+        started = time.perf_counter()
+        reply = {"id": request.get("id"), "path": request.get("path")}
+        try:
+            if "text" in request:
+                reply["symbols"] = indexer.index_text(request["path"], request["text"])
+            else:
+                reply["symbols"] = indexer.index_file(request["path"])
+        except Exception as e:
+            reply["error"] = str(e)
+        reply["seconds"] = time.perf_counter() - started
+        sys.stdout.write(json.dumps(reply) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
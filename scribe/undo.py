@@ -0,0 +1,293 @@
+"""Undo history for Scribe - word-sized steps, a memory budget, and older steps spilled to disk
+
+A step is a list of [offset, removed text, inserted text] edits applied in
+order. Typing and Backspace/Delete runs are merged into one step per word
+(the space after a word belongs to it), every other edit is a step of its
+own, and Replace All collects its edits into a single step.
+
+Steps are counted in characters. When a history holds more than its
+budget, its oldest steps are compressed and appended to a store file, and
+are read back one at a time as undo reaches them. Undone steps waiting
+to be redone are not spilled; past the budget the farthest ones are
+dropped. Saving the history at exit records the store along with the
+size and mtime of the file it belongs to, so the next run can take it
+over if the file is unchanged. Stores belong to the editor that made them
+(see scribe.owner); only those of editors no longer running are cleaned up.
+"""
+
+import json
+import os
+import zlib
+
+from scribe.owner import claim, orphaned_names, owned_name
+from scribe.session import CONFIG_DIR
+
+UNDO_DIR = os.path.join(CONFIG_DIR, "undo")
+UNDO_VERSION = 1
+STORE_LIMIT = 256 * 1024 * 1024  # Bytes a store may grow to before its oldest half is dropped
+
+
+def step_size(step):
+    """Return the characters held by a step"""
+    return sum(len(removed) + len(inserted) for _, removed, inserted in step)
+
+
+def meta_path(file_path, directory=UNDO_DIR):
+    """Return where the saved history of a file is described"""
+    import hashlib  # Only needed at exit and on reopening, so start-up doesn't pay for it
+    key = os.path.normcase(os.path.abspath(file_path)).encode("utf-8", errors="surrogatepass")
+    return os.path.join(directory, hashlib.sha1(key).hexdigest() + ".json")
+
+
+class UndoHistory:
+    """Undo and redo stacks of one tab, kept within a memory budget"""
+
+    def __init__(self, budget, directory=UNDO_DIR):
+        self.budget = budget  # Characters kept in memory before old steps are spilled
+        self.directory = directory
+        self.enabled = True  # Edits are recorded only while True (not while a file loads)
+        self.memory = 0  # Characters held by the in-memory steps of both stacks
+        self.store_path = None  # Store file of spilled steps, created by the first spill
+        self._undo = []  # Steps in memory, oldest first (older ones are in the store)
+        self._redo = []  # Undone steps, the next one to redo last
+        self._spilled = []  # [offset, length] of each step in the store, oldest first
+        self._group = None  # Step collecting edits between begin_group and end_group
+        self._run = None  # "insert" or "delete" while the newest step is a typing run that may grow
+
+    def can_undo(self):
+        """Return True if there is a step to undo"""
+        return bool(self._undo or self._spilled)
+
+    def can_redo(self):
+        """Return True if there is a step to redo"""
+        return bool(self._redo)
+
+    def record(self, offset, removed, inserted):
+        """Note an edit (removed was replaced by inserted at offset), merging typing into word-sized steps"""
+        if not self.enabled or (not removed and not inserted):
+            return
+        if self._redo:
+            self.memory -= sum(map(step_size, self._redo))
+            self._redo = []  # A new edit ends the redo chain
+        self.memory += len(removed) + len(inserted)
+        if self._group is not None:
+            self._group.append([offset, removed, inserted])
+        elif not self._merge(offset, removed, inserted):
+            self._undo.append([[offset, removed, inserted]])
+            if len(inserted) == 1 and not removed and inserted != "\n":
+                self._run = "insert"
+            elif len(removed) == 1 and not inserted and removed != "\n":
+                self._run = "delete"
+            else:
+                self._run = None
+        if self.memory > self.budget:
+            self.spill(self.budget // 2)
+
+    def _merge(self, offset, removed, inserted):
+        """Add a keystroke to the typing run of the newest step; returns False if it starts a new step"""
+        if self._run is None or not self._undo:
+            return False
+        last = self._undo[-1][-1]
+        if self._run == "insert" and len(inserted) == 1 and not removed and inserted != "\n":
+            if last[0] + len(last[2]) == offset and not (last[2][-1].isspace() and not inserted.isspace()):
+                last[2] += inserted
+                return True
+        elif self._run == "delete" and len(removed) == 1 and not inserted and removed != "\n":
+            if offset + 1 == last[0] and not (last[1][0].isspace() and not removed.isspace()):  # Backspace
+                last[0] = offset
+                last[1] = removed + last[1]
+                return True
+            if offset == last[0] and not (last[1][-1].isspace() and not removed.isspace()):  # Delete key
+                last[1] += removed
+                return True
+        return False
+
+    def separator(self):
+        """End the current typing run, so the next edit starts a new step"""
+        self._run = None
+
+    def begin_group(self):
+        """Collect every edit until end_group into one step"""
+        self.end_group()
+        self._group = []
+        self._undo.append(self._group)
+        self._run = None
+
+    def end_group(self):
+        """Close the step opened by begin_group"""
+        if self._group is not None and not self._group:
+            self._undo.pop()  # Nothing was recorded
+        self._group = None
+
+    def undo(self):
+        """Return the (start, end, text) replacements that undo the newest step, in order, or None"""
+        self.end_group()
+        self._run = None
+        if self._undo:
+            step = self._undo.pop()
+        elif self._spilled:
+            step = self._read_spilled()
+            if step is None:
+                return None
+            self.memory += step_size(step)
+        else:
+            return None
+        self._redo.append(step)
+        if self.memory > self.budget:
+            self.spill(self.budget // 2)
+        return [(offset, offset + len(inserted), removed) for offset, removed, inserted in reversed(step)]
+
+    def redo(self):
+        """Return the (start, end, text) replacements that redo the last undone step, in order, or None"""
+        self.end_group()
+        self._run = None
+        if not self._redo:
+            return None
+        step = self._redo.pop()
+        self._undo.append(step)
+        return [(offset, offset + len(removed), inserted) for offset, removed, inserted in step]
+
+    def spill(self, target=0):
+        """Move the oldest steps to the store until no more than target characters are held in memory"""
+        steps = []
+        count = 0
+        while self.memory > target and count < len(self._undo) and self._undo[count] is not self._group:
+            self.memory -= step_size(self._undo[count])
+            steps.append(self._undo[count])
+            count += 1
+        del self._undo[:count]
+        while self.memory > target and self._redo:
+            self.memory -= step_size(self._redo.pop(0))  # Too far back to redo - dropped
+        if not steps:
+            return
+        try:
+            if self.store_path is None:
+                self.store_path = os.path.join(claim(self.directory), owned_name(".undo"))
+            with open(self.store_path, "ab") as store:
+                position = store.tell()
+                for step in steps:
+                    data = zlib.compress(json.dumps(step).encode("utf-8"), 1)  # Fast, and text compresses well
+                    store.write(data)
+                    self._spilled.append([position, len(data)])
+                    position += len(data)
+            if position > STORE_LIMIT:
+                self._trim_store()
+        except OSError:
+            self.discard()  # No room on disk - the older history is lost rather than the memory budget
+
+    def _read_spilled(self):
+        """Take the newest step out of the store (None if the store can't be read)"""
+        position, length = self._spilled.pop()
+        try:
+            with open(self.store_path, "r+b") as store:
+                store.seek(position)
+                data = store.read(length)
+                store.truncate(position)
+            return json.loads(zlib.decompress(data).decode("utf-8"))
+        except (OSError, ValueError, zlib.error):
+            self.discard()  # Damaged or deleted - nothing older can be undone
+            return None
+
+    def _trim_store(self):
+        """Drop the oldest half of the spilled steps"""
+        keep = self._spilled[len(self._spilled) // 2:]
+        start = keep[0][0]
+        with open(self.store_path, "rb") as store:
+            store.seek(start)
+            data = store.read()
+        temp_path = self.store_path + ".tmp"
+        with open(temp_path, "wb") as store:
+            store.write(data)
+        os.replace(temp_path, self.store_path)
+        self._spilled = [[position - start, length] for position, length in keep]
+
+    def reset(self, enabled=True):
+        """Forget every step (after loading a file, or when the text is replaced wholesale)"""
+        self.discard()
+        self.enabled = enabled
+        self.memory = 0
+        self._undo = []
+        self._redo = []
+        self._group = None
+        self._run = None
+
+    def discard(self):
+        """Delete the store file"""
+        if self.store_path:
+            try:
+                os.remove(self.store_path)
+            except OSError:
+                pass
+        self.store_path = None
+        self._spilled = []
+
+    def save(self, file_path):
+        """Keep the undo steps for the next run (the tab must match file_path on disk); redo is dropped"""
+        self.end_group()
+        self.memory -= sum(map(step_size, self._redo))
+        self._redo = []
+        self.spill(0)
+        if not self._spilled:
+            return
+        stat = os.stat(file_path)
+        meta = {"undo": UNDO_VERSION, "path": os.path.abspath(file_path), "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns, "store": os.path.basename(self.store_path), "steps": self._spilled}
+        with open(meta_path(file_path, self.directory), "w", encoding="utf-8") as file:
+            json.dump(meta, file)
+        self.store_path = None  # The store now belongs to the saved history
+        self._spilled = []
+
+    def restore(self, file_path):
+        """Take over the history saved for file_path if the file is unchanged since; returns True if it was"""
+        path = meta_path(file_path, self.directory)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                meta = json.load(file)
+            os.remove(path)  # Saved again at the next exit if still wanted
+        except (OSError, ValueError):
+            return False
+        store_path = os.path.join(self.directory, str(meta.get("store")))
+        try:
+            stat = os.stat(file_path)
+            usable = (meta.get("undo") == UNDO_VERSION and meta.get("path") == os.path.abspath(file_path)
+                      and (meta.get("size"), meta.get("mtime_ns")) == (stat.st_size, stat.st_mtime_ns)
+                      and os.path.exists(store_path))
+        except (OSError, AttributeError):
+            usable = False
+        if not usable:
+            try:
+                os.remove(store_path)
+            except OSError:
+                pass
+            return False
+        try:
+            owned_path = os.path.join(claim(self.directory), owned_name(".undo"))
+            os.replace(store_path, owned_path)  # Ours now, so other editors' clean-ups leave it alone
+        except OSError:
+            return False
+        self.reset(self.enabled)
+        self.store_path = owned_path
+        self._spilled = meta["steps"]
+        return True
+
+
+def remove_stale_stores(directory=UNDO_DIR):
+    """Delete store files of editors no longer running that no saved history refers to (left by a crash)"""
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    referenced = set()
+    for name in names:
+        if name.endswith(".json"):
+            try:
+                with open(os.path.join(directory, name), "r", encoding="utf-8") as file:
+                    referenced.add(json.load(file).get("store"))
+            except (OSError, ValueError, AttributeError):
+                pass
+    for name in orphaned_names(directory):
+        if name.endswith((".undo", ".tmp")) and name not in referenced:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
@@ -0,0 +1,144 @@
+"""Tests for scribe.batch"""
+
+import codecs
+import functools
+import gzip
+import os
+import re
+
+import pytest
+
+from scribe import batch
+from scribe.batch import expand_paths, main, replace_in_file
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    """Read files in blocks of a few characters, so small files span many blocks"""
+    monkeypatch.setattr(batch, "read_blocks", functools.partial(batch.read_blocks, block_chars=7))
+
+
+def test_expand_paths(tmp_path):
+    """Files, directories and recursive globs are expanded, sorted and deduplicated; empty patterns are reported"""
+    (tmp_path / "sub" / "deep").mkdir(parents=True)
+    for name in ("a.txt", "sub/b.txt", "sub/deep/c.txt", "sub/deep/d.ini"):
+        (tmp_path / name).write_text("x")
+    root = str(tmp_path)
+    paths, unmatched = expand_paths([os.path.join(root, "**", "*.txt"), os.path.join(root, "sub"),
+                                     os.path.join(root, "a.txt"), os.path.join(root, "*.none")])
+    expected = ["a.txt", "sub/b.txt", "sub/deep/c.txt", "sub/deep/d.ini"]
+    assert paths == [os.path.join(root, *name.split("/")) for name in expected]
+    assert unmatched == [os.path.join(root, "*.none")]
+
+
+def test_case_is_matched_by_default(tmp_path):
+    """Only the exact case is replaced unless case_sensitive is turned off"""
+    path = tmp_path / "a.txt"
+    path.write_text("foo Foo FOO\n")
+    assert replace_in_file(str(path), "foo", "bar")["replacements"] == 1
+    assert path.read_text() == "bar Foo FOO\n"
+    assert replace_in_file(str(path), "foo", "bar", case_sensitive=False)["replacements"] == 2
+    assert path.read_text() == "bar bar bar\n"
+
+
+def test_regex_groups_and_whole_words(tmp_path):
+    """Regex replacements expand groups, and whole_word skips matches inside words"""
+    path = tmp_path / "a.txt"
+    path.write_text("port: 80\nairport: 81\n")
+    result = replace_in_file(str(path), r"port: (\d+)", r"port: 1\1", regex=True, whole_word=True)
+    assert result["replacements"] == 1
+    assert path.read_text() == "port: 180\nairport: 81\n"
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-16", "cp1252"])
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_format_is_kept(tmp_path, encoding, newline):
+    """The file's encoding (with its byte order mark) and line endings are written back unchanged"""
+    path = tmp_path / "a.txt"
+    path.write_bytes("café one\ncafé two\n".replace("\n", newline).encode(encoding))
+    assert replace_in_file(str(path), "café", "bar")["replacements"] == 2
+    assert path.read_bytes() == "bar one\nbar two\n".replace("\n", newline).encode(encoding)
+    if encoding == "utf-16":
+        assert path.read_bytes()[:2] in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+
+
+def test_compression_is_kept(tmp_path):
+    """A gzip file is rewritten compressed"""
+    path = tmp_path / "a.log.gz"
+    path.write_bytes(gzip.compress(b"error\nok\nerror\n"))
+    assert replace_in_file(str(path), "error", "warning")["replacements"] == 2
+    assert gzip.decompress(path.read_bytes()) == b"warning\nok\nwarning\n"
+
+
+def test_binary_and_unmatched_files_are_untouched(tmp_path):
+    """Binary files are skipped and files without matches are not rewritten"""
+    binary = tmp_path / "a.bin"
+    binary.write_bytes(b"foo\0foo")
+    assert replace_in_file(str(binary), "foo", "bar")["skipped"] == "binary"
+    assert binary.read_bytes() == b"foo\0foo"
+    text = tmp_path / "a.txt"
+    text.write_text("nothing here\n")
+    mtime = os.stat(text).st_mtime_ns
+    assert replace_in_file(str(text), "foo", "bar")["replacements"] == 0
+    assert os.stat(text).st_mtime_ns == mtime
+
+
+@pytest.mark.parametrize("query, replacement, regex", [
+    ("line", "LINE", False),
+    (r"\n", " ", True),
+    (r"^l", "> l", True),
+    (r"e$", "E", True),
+])
+def test_blocks_give_the_same_result(tmp_path, monkeypatch, query, replacement, regex):
+    """Files read in many small blocks are changed like a single block, newline edits included"""
+    text = "line one\nline two\nthree\nfour line\nlast line"
+    path = tmp_path / "a.txt"
+    path.write_text(text)
+    expected_diff = replace_in_file(str(path), query, replacement, regex=regex, dry_run=True)["diff"]
+    monkeypatch.setattr(batch, "read_blocks", functools.partial(batch.read_blocks, block_chars=7))
+    small = replace_in_file(str(path), query, replacement, regex=regex, dry_run=True)
+    assert small["diff"] == expected_diff
+    assert path.read_text() == text  # A dry run writes nothing
+    pattern = re.compile(query if regex else re.escape(query), re.MULTILINE)
+    replace_in_file(str(path), query, replacement, regex=regex)
+    assert path.read_text() == pattern.sub(replacement, text)
+
+
+def test_dry_run_diff(tmp_path, small_blocks):
+    """A dry run returns a zero-context unified diff with lines numbered across blocks"""
+    path = tmp_path / "a.txt"
+    path.write_text("alpha\nbeta\ngamma\ndelta\nbeta")
+    result = replace_in_file(str(path), "beta", "BETA", dry_run=True)
+    assert result["diff"] == (f"--- a/{path}\n+++ b/{path}\n"
+                              "@@ -2,1 +2,1 @@\n-beta\n+BETA\n"
+                              "@@ -5,1 +5,1 @@\n-beta\n\\ No newline at end of file\n"
+                              "+BETA\n\\ No newline at end of file\n")
+    joined = replace_in_file(str(path), r"alpha\n", "", regex=True, dry_run=True)["diff"]
+    assert joined.endswith("@@ -1,2 +1,1 @@\n-alpha\n-beta\n+beta\n")  # The next line joins the edited one
+
+
+def test_empty_matches_are_not_replaced(tmp_path):
+    """A pattern that can match nothing changes nothing, like the editor's Replace"""
+    path = tmp_path / "a.txt"
+    path.write_text("one\ntwo\n")
+    assert replace_in_file(str(path), "^", "> ", regex=True)["replacements"] == 0
+    assert path.read_text() == "one\ntwo\n"
+
+
+def test_main_exit_status(tmp_path, capsys):
+    """main returns 0 when every file was handled, 1 when one failed, and rejects bad arguments with 2"""
+    good = tmp_path / "good.txt"
+    good.write_text("foo\n")
+    assert main(["foo", "bar", str(good), "--workers", "1"]) == 0
+    assert good.read_text() == "bar\n"
+    assert "1 replacement(s)" in capsys.readouterr().out
+
+    bad = tmp_path / "bad.txt"
+    bad.write_bytes(b"foo\n" * 20000 + b"\xff\n")  # Sniffed as UTF-8, fails to decode past the first block
+    assert main(["foo", "bar", str(bad), "--workers", "1"]) == 1
+    assert "bad.txt: error" in capsys.readouterr().err
+
+    for argv in (["", "x", str(good)], ["(", "x", str(good), "--regex"], ["(a)", r"\2", str(good), "--regex"]):
+        with pytest.raises(SystemExit) as exit_info:
+            main(argv)
+        assert exit_info.value.code == 2
@@ -0,0 +1,130 @@
+"""Tests for scribe.diff"""
+
+import random
+
+import pytest
+
+from scribe import diff
+from scribe.diff import diff_lines, myers, split_lines, unique_anchors
+
+
+def apply(opcodes, a_lines, b_lines):
+    """Rebuild b_lines from a_lines and the opcodes, checking they cover both sides in order"""
+    result = []
+    a_at = b_at = 0
+    for tag, a0, a1, b0, b1 in opcodes:
+        assert (a0, b0) == (a_at, b_at)
+        if tag == "equal":
+            assert a_lines[a0:a1] == b_lines[b0:b1]
+            result += a_lines[a0:a1]
+        else:
+            assert tag in ("replace", "delete", "insert")
+            assert (a0 < a1 or tag == "insert") and (b0 < b1 or tag == "delete")
+            result += b_lines[b0:b1]
+        a_at, b_at = a1, b1
+    assert (a_at, b_at) == (len(a_lines), len(b_lines))
+    return result
+
+
+def lcs_length(a, b):
+    """Return the length of the longest common subsequence of two short lists"""
+    row = [0] * (len(b) + 1)
+    for x in a:
+        diagonal = 0
+        for j, y in enumerate(b):
+            diagonal, row[j + 1] = row[j + 1], diagonal + 1 if x == y else max(row[j], row[j + 1])
+    return row[-1]
+
+
+def random_pair(rng, size, alphabet):
+    """Return two line lists, the second an edited copy of the first"""
+    a = [rng.choice(alphabet) for _ in range(size)]
+    b = list(a)
+    for _ in range(rng.randrange(size + 1)):
+        position = rng.randrange(len(b) + 1)
+        if b and rng.random() < 0.5:
+            del b[min(position, len(b) - 1)]
+        else:
+            b.insert(position, rng.choice(alphabet))
+    return a, b
+
+
+@pytest.mark.parametrize("text, lines", [
+    ("", [""]),
+    ("one", ["one"]),
+    ("one\n", ["one"]),
+    ("one\ntwo", ["one", "two"]),
+    ("one\n\n", ["one", ""]),
+    ("\n", [""]),
+])
+def test_split_lines(text, lines):
+    """A final newline ends the last line instead of starting another"""
+    assert split_lines(text) == lines
+
+
+def test_identical_and_empty_inputs():
+    """Equal inputs are one equal block, and one empty side is a single insert or delete"""
+    lines = ["a", "b", "c"]
+    assert list(diff_lines(lines, list(lines))) == [("equal", 0, 3, 0, 3)]
+    assert list(diff_lines([], lines)) == [("insert", 0, 0, 0, 3)]
+    assert list(diff_lines(lines, [])) == [("delete", 0, 3, 0, 0)]
+    assert list(diff_lines([], [])) == []
+
+
+def test_adjacent_changes_are_merged():
+    """A delete next to an insert is reported as one replace"""
+    opcodes = list(diff_lines(["a", "b", "c", "d"], ["a", "x", "y", "d"]))
+    assert opcodes == [("equal", 0, 1, 0, 1), ("replace", 1, 3, 1, 3), ("equal", 3, 4, 3, 4)]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_diff_rebuilds_the_target(seed):
+    """The opcodes of random edits turn one side into the other"""
+    rng = random.Random(seed)
+    alphabet = ["line %d" % n for n in range(rng.choice([3, 10, 200]))]
+    a, b = random_pair(rng, rng.randrange(60), alphabet)
+    assert apply(diff_lines(a, b), a, b) == b
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_myers_is_shortest(seed):
+    """Myers keeps as many lines equal as the longest common subsequence"""
+    rng = random.Random(seed)
+    a, b = random_pair(rng, rng.randrange(15), ["a", "b", "c"])
+    opcodes = myers(a, b, 0, len(a), 0, len(b))
+    apply(opcodes, a, b)
+    assert sum(a1 - a0 for tag, a0, a1, _, _ in opcodes if tag == "equal") == lcs_length(a, b)
+
+
+def test_myers_gives_up_past_max_cost():
+    """A gap costing more edits than allowed returns None, and diff_lines shows it as one replaced block"""
+    a = ["a"] * 10
+    b = ["b"] * 10
+    assert myers(a, b, 0, 10, 0, 10, max_cost=5) is None
+    assert myers(a, b, 0, 10, 0, 10, max_cost=20) is not None
+    assert list(diff_lines(a, b, max_cost=5)) == [("replace", 0, 10, 0, 10)]
+
+
+def test_unique_anchors_follow_the_longest_ordered_run():
+    """Lines unique to both sides are matched in their longest increasing order; repeated lines are not anchors"""
+    a = ["x", "1", "2", "3", "x", "4"]
+    b = ["3", "1", "2", "4", "x", "x"]
+    assert unique_anchors(a, b, 0, len(a), 0, len(b)) == ([1, 2, 5], [1, 2, 3])
+    assert unique_anchors(["a", "a"], ["a", "a"], 0, 2, 0, 2) == ([], [])
+
+
+def test_unique_anchors_stay_within_the_ranges():
+    """Only the given ranges are considered, and the returned indices are absolute"""
+    a = ["p", "q", "r", "s"]
+    b = ["s", "q", "r", "p"]
+    assert unique_anchors(a, b, 1, 3, 1, 3) == ([1, 2], [1, 2])
+
+
+def test_hash_collisions_are_not_reported_equal(monkeypatch):
+    """Lines that share a hash but differ come out as replaced"""
+    monkeypatch.setattr(diff, "hash", len, raising=False)  # Every line of the same length collides
+    a = ["aa", "bb", "cc", "dd"]
+    b = ["aa", "xx", "cc", "dd"]
+    opcodes = list(diff_lines(a, b))
+    assert apply(opcodes, a, b) == b
+    assert ("replace", 1, 2, 1, 2) in opcodes
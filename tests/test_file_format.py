@@ -0,0 +1,84 @@
+"""Tests for scribe.file_format"""
+
+import bz2
+import codecs
+import gzip
+import io
+import lzma
+
+import pytest
+
+from scribe.file_format import (compression_for_path, detect_compression, detect_format, open_compressed,
+                                read_text, sniff_encoding)
+from scribe.saver import atomic_write
+
+
+@pytest.mark.parametrize("data, encoding", [
+    (codecs.BOM_UTF8 + b"abc", "utf-8-sig"),
+    (codecs.BOM_UTF16_LE + "abc".encode("utf-16-le"), "utf-16"),
+    (codecs.BOM_UTF32_LE + "abc".encode("utf-32-le"), "utf-32"),
+    ("plain text".encode("utf-16-le"), "utf-16-le"),
+    ("plain text".encode("utf-16-be"), "utf-16-be"),
+    ("naïve café".encode("utf-8"), "utf-8"),
+    ("naïve café €".encode("cp1252"), "cp1252"),
+    (b"\x81\x8d\x8f", "latin-1"),  # Bytes cp1252 leaves undefined
+    (b"", "utf-8"),
+])
+def test_sniff_encoding(data, encoding):
+    """Byte order marks, then UTF-16, UTF-8, Windows-1252 and Latin-1"""
+    assert sniff_encoding(data) == encoding
+
+
+def test_sniff_encoding_allows_a_character_cut_at_the_end():
+    """A UTF-8 character cut off by the end of the sniffed block is still UTF-8"""
+    assert sniff_encoding("ab€".encode("utf-8")[:-1]) == "utf-8"
+
+
+def test_compression_for_path():
+    """New files get their compression from the extension"""
+    assert compression_for_path("a.log.GZ") == "gzip"
+    assert compression_for_path("a.bz2") == "bz2"
+    assert compression_for_path("a.xz") == "xz"
+    assert compression_for_path("a.txt") is None
+
+
+@pytest.mark.parametrize("compression, compress", [("gzip", gzip.compress), ("bz2", bz2.compress),
+                                                   ("xz", lzma.compress), (None, lambda data: data)])
+def test_detect_and_read_compressed_files(tmp_path, compression, compress):
+    """Compression is found by magic bytes, whatever the name, and the text decoded after decompressing"""
+    path = tmp_path / "file.dat"
+    path.write_bytes(compress("é\r\nline two\n".encode("cp1252")))
+    assert detect_compression(str(path)) == compression
+    assert detect_format(str(path)) == ("cp1252", compression)
+    text, size, encoding, found = read_text(str(path))
+    assert (text, size, encoding, found) == ("é\nline two\n", path.stat().st_size, "cp1252", compression)
+
+
+def test_read_text_errors(tmp_path):
+    """Bytes that don't decode raise by default, and become U+FFFD with errors="replace\""""
+    path = tmp_path / "file.txt"
+    path.write_bytes(b"a" * 70000 + b"\xff")  # Past the sniffed block, so the file sniffs as UTF-8
+    with pytest.raises(UnicodeDecodeError):
+        read_text(str(path))
+    assert read_text(str(path), errors="replace")[0].endswith("a�")
+
+
+def test_open_compressed_leaves_raw_open():
+    """Closing the wrapper finishes the compressed stream without closing the raw file"""
+    raw = io.BytesIO()
+    with open_compressed(raw, "gzip", "wb") as stream:
+        stream.write(b"data")
+    assert not raw.closed
+    assert gzip.decompress(raw.getvalue()) == b"data"
+    assert open_compressed(raw, None) is raw
+
+
+@pytest.mark.parametrize("encoding, compression", [("utf-8", None), ("utf-8-sig", None), ("utf-16", "gzip"),
+                                                   ("cp1252", "bz2"), ("utf-32", "xz")])
+def test_round_trip_through_the_saver(tmp_path, encoding, compression):
+    """A file saved in the encoding and compression it was read with reads back the same"""
+    path = tmp_path / "file"
+    text = "first line\nsecond line é\n"
+    atomic_write(str(path), [text], encoding, compression)
+    assert read_text(str(path))[0] == text
+    assert detect_format(str(path)) == (encoding, compression)
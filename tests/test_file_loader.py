@@ -0,0 +1,87 @@
+"""Tests for scribe.file_loader"""
+
+import gzip
+
+import pytest
+
+from scribe import file_loader
+from scribe.file_loader import FileLoader
+
+
+def drain(loader):
+    """Return every chunk the reader queues before its final None"""
+    chunks = []
+    while True:
+        chunk = loader.chunks.get(timeout=5)
+        if chunk is None:
+            return chunks
+        chunks.append(chunk)
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    """Decode a few characters at a time, so small files arrive in many chunks"""
+    monkeypatch.setattr(file_loader, "CHUNK_SIZE", 5)
+
+
+def test_chunks_rebuild_the_text(tmp_path, small_chunks):
+    """The chunks join to the decoded text, with universal newlines, and progress reaches 1"""
+    path = tmp_path / "a.txt"
+    path.write_bytes("café one\r\ntwo\rthree\n".encode("utf-8"))
+    loader = FileLoader(str(path))
+    assert loader.encoding == "utf-8" and loader.compression is None
+    loader.start()
+    chunks = drain(loader)
+    assert len(chunks) > 1 and all(len(chunk) <= 5 for chunk in chunks)
+    assert "".join(chunks) == "café one\ntwo\nthree\n"
+    assert loader.error is None
+    assert loader.progress() == 1.0
+
+
+def test_compressed_file_and_encoding_override(tmp_path, small_chunks):
+    """Compressed files are decompressed on the way; a given encoding wins over the sniffed one"""
+    path = tmp_path / "a.log"
+    path.write_bytes(gzip.compress("naïve\n".encode("cp1252")))
+    loader = FileLoader(str(path))
+    assert (loader.encoding, loader.compression) == ("cp1252", "gzip")
+    assert loader.total_bytes == path.stat().st_size
+    loader.start()
+    assert "".join(drain(loader)) == "naïve\n"
+
+    loader = FileLoader(str(path), encoding="latin-1")
+    loader.start()
+    assert "".join(drain(loader)) == "naïve\n"  # Same characters in both encodings
+
+
+def test_empty_file(tmp_path):
+    """An empty file finishes at once"""
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+    loader = FileLoader(str(path))
+    assert loader.progress() == 1.0
+    loader.start()
+    assert drain(loader) == []
+
+
+def test_errors_are_reported_after_the_chunks_read(tmp_path, small_chunks):
+    """A decoding error ends the load with the error set instead of raising on the reader thread"""
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"a" * 70000 + b"\xff\n")  # Past the sniffed block, so the file sniffs as UTF-8
+    loader = FileLoader(str(path))
+    loader.start()
+    assert "".join(drain(loader)).startswith("aaaaa")
+    assert isinstance(loader.error, UnicodeDecodeError)
+
+
+def test_cancel_stops_the_reader(tmp_path, small_chunks):
+    """A cancelled load stops reading even while its queue is full"""
+    path = tmp_path / "a.txt"
+    path.write_text("x" * 1000)
+    loader = FileLoader(str(path))
+    loader.start()
+    while not loader.chunks.full():
+        loader.thread.join(0.01)
+    loader.cancel()
+    loader.thread.join(5)
+    assert not loader.thread.is_alive()
+    assert loader.chunks.qsize() == file_loader.QUEUE_DEPTH  # Nothing more was read
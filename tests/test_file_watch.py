@@ -0,0 +1,79 @@
+"""Tests for scribe.file_watch"""
+
+import os
+
+from scribe.file_watch import FileWatch, stat_signature
+
+
+def bump_mtime(path):
+    """Move a file's mtime forward, so a rewrite of the same size still changes its signature"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_unchanged_and_touched_files(tmp_path):
+    """An untouched file costs one stat; a touched one with the same bytes is not a change"""
+    path = tmp_path / "app.log"
+    path.write_bytes(b"one\n")
+    watch = FileWatch(str(path))
+    assert watch.check() is None
+    bump_mtime(path)
+    assert watch.check() is None
+    assert watch.signature == stat_signature(str(path))
+
+
+def test_appends_are_read_from_the_old_end(tmp_path):
+    """Appended data is reported as grown and read without the part the tab already has"""
+    path = tmp_path / "app.log"
+    path.write_bytes(b"one\n")
+    watch = FileWatch(str(path))
+    with open(path, "ab") as file:
+        file.write(b"two\r\nthree\n")
+    assert watch.check() == "grown"
+    assert watch.read_appended() == "two\nthree\n"
+    assert watch.offset == path.stat().st_size
+    assert watch.check() is None
+    assert watch.read_appended() == ""
+
+
+def test_rewrites_truncation_and_deletion(tmp_path):
+    """A rewrite, even of the same size, and a truncation are changes; a missing file is deleted"""
+    path = tmp_path / "app.log"
+    path.write_bytes(b"one\ntwo\n")
+    watch = FileWatch(str(path))
+    path.write_bytes(b"ONE\ntwo\nthree\n")  # Grown, but the old bytes differ
+    assert watch.check() == "changed"
+    watch = FileWatch(str(path))
+    path.write_bytes(b"ONE\ntwo\nthreE\n")
+    bump_mtime(path)
+    assert watch.check() == "changed"
+    path.write_bytes(b"x\n")
+    assert watch.check() == "changed"
+    watch.acknowledge()
+    assert watch.check() is None
+    path.unlink()
+    assert watch.check() == "deleted"
+
+
+def test_split_characters_and_newlines_carry_over(tmp_path):
+    """A character or CRLF pair cut by the read limit is completed by the next read"""
+    path = tmp_path / "app.log"
+    path.write_bytes("é\r\nz".encode("utf-8"))
+    watch = FileWatch(str(path), offset=0)
+    assert watch.check() == "grown"  # The tab holds nothing yet
+    parts = [watch.read_appended(limit=1) for _ in range(5)]
+    assert "".join(parts) == "é\nz"
+    assert parts[0] == ""  # Half of "é"
+    assert watch.check() is None
+
+
+def test_restart_follows_a_rotated_file_from_its_start(tmp_path):
+    """restart reads whatever is on disk from the new offset"""
+    path = tmp_path / "app.log"
+    path.write_bytes(b"old contents\n")
+    watch = FileWatch(str(path))
+    path.write_bytes(b"new\n")
+    assert watch.check() == "changed"
+    watch.restart()
+    assert watch.read_appended() == "new\n"
+    assert watch.check() is None
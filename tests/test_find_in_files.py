@@ -0,0 +1,70 @@
+"""Tests for scribe.find_in_files"""
+
+import gzip
+import os
+import re
+
+from scribe.find_in_files import glob_to_regex, iter_files, search_file_batch, search_text
+from scribe.search import compile_pattern
+
+
+def write(path, data=b"x"):
+    """Create a file (and its directory) with some bytes in it"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def test_glob_to_regex():
+    """Gitignore globs become regular expressions matching the same paths"""
+    assert re.fullmatch(glob_to_regex("*.py"), "a.py")
+    assert not re.fullmatch(glob_to_regex("*.py"), "dir/a.py")
+    assert re.fullmatch(glob_to_regex("**/build"), "a/b/build")
+    assert re.fullmatch(glob_to_regex("**/build"), "build")
+    assert re.fullmatch(glob_to_regex("[!a]x"), "bx")
+    assert not re.fullmatch(glob_to_regex("[!a]x"), "ax")
+
+
+def test_iter_files_honors_gitignore(tmp_path):
+    """Ignored files and directories, and .git, are skipped; negated rules bring files back"""
+    root = str(tmp_path)
+    write(os.path.join(root, ".gitignore"), b"*.log\nbuild/\n!keep.log\n")
+    write(os.path.join(root, "a.txt"))
+    write(os.path.join(root, "b.log"))
+    write(os.path.join(root, "keep.log"))
+    write(os.path.join(root, "build", "out.txt"))
+    write(os.path.join(root, ".git", "config"))
+    write(os.path.join(root, "sub", ".gitignore"), b"/only_here.txt\n")
+    write(os.path.join(root, "sub", "only_here.txt"))
+    write(os.path.join(root, "sub", "c.txt"))
+    found = sorted(os.path.relpath(path, root).replace(os.sep, "/") for path in iter_files(root))
+    assert found == [".gitignore", "a.txt", "keep.log", "sub/.gitignore", "sub/c.txt"]
+    assert len(list(iter_files(root, honor_gitignore=False))) == 8  # .git is always skipped
+
+
+def test_search_text_lines_and_columns():
+    """Matches report their line, column and line text"""
+    pattern = compile_pattern("ab")
+    assert search_text(pattern, "xab\n\nab ab\nz") == [[1, 1, "xab"], [3, 0, "ab ab"], [3, 3, "ab ab"]]
+    assert search_text(pattern, "ab ab ab", limit=2) == [[1, 0, "ab ab ab"], [1, 3, "ab ab ab"]]
+
+
+def test_search_file_batch_reads_files_like_the_editor(tmp_path):
+    """Files are decoded in their sniffed encoding and decompressed; binary files are skipped"""
+    paths = {
+        "cp1252.txt": "café naïve\r\nline two café\r\n".encode("cp1252"),
+        "utf16.txt": "x café\n".encode("utf-16"),
+        "packed.txt.gz": gzip.compress("zz café\n".encode("utf-8")),
+        "binary.bin": b"caf\x00\x01\x02",
+        "corrupt.xz": b"\xfd7zXZ\x00garbage",
+    }
+    for name, data in paths.items():
+        write(os.path.join(tmp_path, name), data)
+    names = sorted(os.path.join(tmp_path, name) for name in paths)
+    count, results = search_file_batch(names, "café", False, False, False)
+    assert count == 5
+    assert {os.path.basename(path): matches for path, matches in results} == {
+        "cp1252.txt": [[1, 0, "café naïve"], [2, 9, "line two café"]],
+        "utf16.txt": [[1, 2, "x café"]],
+        "packed.txt.gz": [[1, 3, "zz café"]],
+    }
@@ -0,0 +1,113 @@
+"""Tests for scribe.highlight"""
+
+import random
+
+from scribe.highlight import GRAMMARS, Grammar, Highlighter, PythonGrammar, grammar_for_path, register_grammar
+
+
+def kinds(line, state=None):
+    """Return [(token text, kind)] for one line, and the end state"""
+    tokens, state = PythonGrammar().tokenize_line(line, state)
+    return [(line[start:end], kind) for start, end, kind in tokens], state
+
+
+def test_python_tokens():
+    """Keywords, builtins, definitions, strings, numbers and comments"""
+    assert kinds("def f(x): return len(x) + 0x1F  # done") == ([
+        ("def", "keyword"), ("f", "definition"), ("return", "keyword"), ("len", "builtin"),
+        ("0x1F", "number"), ("# done", "comment")], None)
+    assert kinds("s = 'a # not a comment' + r\"\\d\"")[0] == [
+        ("'a # not a comment'", "string"), ("r\"\\d\"", "string")]
+    assert kinds("    @app.route")[0] == [("@app.route", "decorator")]
+
+
+def test_python_triple_quoted_strings_span_lines():
+    """The state carries an open triple-quoted string to the next lines"""
+    tokens, state = kinds('x = """start')
+    assert tokens == [('"""start', "string")] and state == '"""'
+    assert kinds("middle with def", state) == ([("middle with def", "string")], '"""')
+    assert kinds('end""" if y', state) == ([('end"""', "string"), ("if", "keyword")], None)
+
+
+def test_grammar_for_path_and_registration():
+    """Grammars are found by extension, and registered ones win"""
+    assert isinstance(grammar_for_path("a/b.PY"), PythonGrammar)
+    assert grammar_for_path("notes.txt") is None
+    assert grammar_for_path(None) is None
+
+    class Other(Grammar):
+        extensions = (".py",)
+
+    other = Other()
+    register_grammar(other)
+    try:
+        assert grammar_for_path("x.py") is other
+    finally:
+        GRAMMARS.remove(other)
+
+
+def full_lex(lines):
+    """Tokens of every line lexed from the top"""
+    grammar = PythonGrammar()
+    state = grammar.initial_state
+    result = []
+    for line in lines:
+        tokens, state = grammar.tokenize_line(line, state)
+        result.append(tokens)
+    return result
+
+
+def catch_up(highlighter, lines, painted, batch=7):
+    """Advance the highlighter over the document until every line is valid, recording what it lexes"""
+    lexed = 0
+    while highlighter.valid_lines < len(lines):
+        start = highlighter.valid_lines
+        for line, tokens in highlighter.advance(lines[start:start + batch]):
+            painted[line - 1] = tokens
+            lexed += 1
+    return lexed
+
+
+def test_incremental_highlighting_matches_a_full_lex():
+    """After random edits, lexing only what the highlighter asks for gives the same tokens as lexing it all"""
+    rng = random.Random(7)
+    pieces = ["x = 1", "def f():", '"""', "'''", "# c", "return 'a'", "s = '''x", "end'''", "", "class A:"]
+    lines = [rng.choice(pieces) for _ in range(200)]
+    highlighter = Highlighter(PythonGrammar())
+    painted = [None] * len(lines)
+    catch_up(highlighter, lines, painted)
+    assert painted == full_lex(lines)
+    for _ in range(300):
+        first = rng.randrange(1, len(lines) + 1)
+        removed = rng.randrange(1, min(4, len(lines) - first + 2))
+        added = rng.randrange(1, 4)
+        new_lines = [rng.choice(pieces) for _ in range(added)]
+        lines[first - 1:first - 1 + removed] = new_lines
+        painted[first - 1:first - 1 + removed] = [None] * added
+        highlighter.lines_changed(first, removed, added)
+        if rng.random() < 0.7:
+            catch_up(highlighter, lines, painted)
+            assert painted == full_lex(lines)
+    catch_up(highlighter, lines, painted)
+    assert painted == full_lex(lines)
+
+
+def test_edit_that_changes_nothing_downstream_stops_early():
+    """A one-line edit that doesn't change the end state lexes that line and the next one, not the rest"""
+    lines = ["x = %d" % number for number in range(1000)]
+    highlighter = Highlighter(PythonGrammar())
+    painted = [None] * len(lines)
+    catch_up(highlighter, lines, painted)
+    lines[499] = "y = 'changed'"
+    highlighter.lines_changed(500, 1, 1)
+    painted[499] = None
+    assert catch_up(highlighter, lines, painted) == 2  # The next line's recorded state shows nothing changed
+    assert painted == full_lex(lines)
+
+
+def test_tokenize_lines_is_provisional():
+    """Painting lines ahead of the valid prefix records nothing"""
+    highlighter = Highlighter(PythonGrammar())
+    results = highlighter.tokenize_lines(10, ["def g():", "pass"])
+    assert [line for line, _ in results] == [10, 11]
+    assert highlighter.valid_lines == 0 and highlighter.end_states == []
@@ -0,0 +1,70 @@
+"""Tests for scribe.instance"""
+
+import os
+import socket
+import threading
+
+import pytest
+
+from scribe.instance import InstanceServer, parse_locations, send_to_running_instance
+
+
+def test_parse_locations(tmp_path):
+    """Arguments become absolute paths with an optional line; a column is dropped"""
+    cwd = str(tmp_path)
+    assert parse_locations(["a.py", "b.py:120", "c.py:7:3", "/abs/d.py"], cwd=cwd) == [
+        [os.path.join(cwd, "a.py"), None],
+        [os.path.join(cwd, "b.py"), 120],
+        [os.path.join(cwd, "c.py"), 7],
+        ["/abs/d.py", None],
+    ]
+
+
+def test_parse_locations_keeps_files_named_with_a_colon(tmp_path):
+    """An argument naming an existing file is a path, even if it looks like path:line"""
+    (tmp_path / "notes:2").write_text("")
+    cwd = str(tmp_path)
+    assert parse_locations(["notes:2", "notes:3"], cwd=cwd) == [
+        [os.path.join(cwd, "notes:2"), None],
+        [os.path.join(cwd, "notes"), 3],
+    ]
+
+
+def test_parse_locations_defaults_to_the_working_directory(tmp_path, monkeypatch):
+    """Relative paths are resolved against the current directory when no cwd is given"""
+    monkeypatch.chdir(tmp_path)
+    assert parse_locations(["x.txt:1"]) == [[os.path.join(os.getcwd(), "x.txt"), 1]]
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+def test_server_round_trip(tmp_path):
+    """A request reaches the running editor, a second server can't start, and the socket is removed on close"""
+    path = str(tmp_path / "instance.sock")
+    assert not send_to_running_instance([["/a", 1]], path=path)  # Nobody is listening yet
+    received = []
+    done = threading.Event()
+    server = InstanceServer(lambda locations: (received.append(locations), done.set()), path=path)
+    assert server.start()
+    try:
+        assert not InstanceServer(lambda locations: None, path=path).start()
+        assert send_to_running_instance([["/a", 1], ["/b", None]], path=path)
+        assert done.wait(5)
+        assert received == [[["/a", 1], ["/b", None]]]
+    finally:
+        server.close()
+    assert not os.path.exists(path)
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+def test_server_replaces_a_stale_socket(tmp_path):
+    """A socket file left by a crashed editor is taken over"""
+    path = str(tmp_path / "instance.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()  # The file stays, with nobody listening
+    server = InstanceServer(lambda locations: None, path=path)
+    try:
+        assert server.start()
+        assert send_to_running_instance([["/a", None]], path=path)
+    finally:
+        server.close()
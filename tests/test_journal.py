@@ -0,0 +1,168 @@
+"""Tests for scribe.journal"""
+
+import os
+import random
+import subprocess
+import sys
+
+from scribe import journal as journal_module
+from scribe.journal import EditJournal, JournalWriter, find_edit, recover_journals, replay_journal
+from scribe.piece_table import PieceTable
+
+
+def flush(journal):
+    """Perform a journal's pending writes and wait until they are on disk"""
+    writer = JournalWriter()
+    writer.submit(journal.take_writes())
+    writer.wait()
+    assert writer.error is None
+
+
+def test_untitled_edits_replay(tmp_path):
+    """Edits to an untitled tab are rebuilt from an empty base"""
+    document = PieceTable()
+    journal = EditJournal(None, lambda: document, str(tmp_path))
+    for offset, text in [(0, "hello"), (5, " world"), (0, ">")]:
+        document.insert(offset, text)
+        journal.record_insert(offset, text)
+    document.delete(1, 3)
+    journal.record_delete(1, 3)
+    flush(journal)
+    assert replay_journal(journal.path) == (None, document.get_text(), False)
+
+
+def test_no_file_until_the_first_edit(tmp_path):
+    """An unedited tab costs no I/O"""
+    journal = EditJournal(None, PieceTable, str(tmp_path))
+    assert journal.take_writes() == []
+    assert journal.discard() == []
+
+
+def test_typing_and_backspace_runs_coalesce(tmp_path):
+    """A run of typing is one insert, and runs of Backspace or Delete are one delete"""
+    journal = EditJournal(None, PieceTable, str(tmp_path))
+    for offset, char in enumerate("abcd"):
+        journal.record_insert(offset, char)
+    journal.record_delete(3, 4)
+    journal.record_delete(2, 3)  # Backspace
+    journal.record_delete(2, 3)  # Then the Delete key
+    assert journal._pending == [{"i": 0, "t": "abcd"}, {"d": [2, 5]}]
+
+
+def test_edits_on_a_file_base_and_conflicts(tmp_path):
+    """A file base is read back from disk; a file that changed since is reported as a conflict"""
+    path = tmp_path / "notes.txt"
+    path.write_text("line one\nline two\n")
+    document = PieceTable(path.read_text())
+    journal = EditJournal(str(path), lambda: document, str(tmp_path / "journal"))
+    document.insert(9, "new ")
+    journal.record_insert(9, "new ")
+    flush(journal)
+    assert replay_journal(journal.path) == (str(path), "line one\nnew line two\n", False)
+    path.write_text("changed by someone else, longer\n")
+    assert replay_journal(journal.path)[2] is True
+
+
+def test_restart_with_snapshot_base(tmp_path):
+    """A snapshot base is written with the first edit"""
+    document = PieceTable("partial text")
+    journal = EditJournal("ignored", lambda: document, str(tmp_path))
+    journal.restart(None, document.snapshot())
+    document.insert(0, "my ")
+    journal.record_insert(0, "my ")
+    flush(journal)
+    assert replay_journal(journal.path)[1] == "my partial text"
+
+
+def test_record_text_and_discard(tmp_path):
+    """record_text replaces the journal with the text; discard deletes the file"""
+    journal = EditJournal(None, PieceTable, str(tmp_path))
+    journal.record_insert(0, "x")
+    flush(journal)
+    journal.record_text("whole text")
+    flush(journal)
+    assert replay_journal(journal.path)[1] == "whole text"
+    writer = JournalWriter()
+    writer.submit(journal.discard())
+    writer.wait()
+    assert not os.path.exists(journal.path)
+
+
+def test_compaction_when_edits_outgrow_the_text(tmp_path, monkeypatch):
+    """A journal larger than its document is rewritten as a single text base"""
+    monkeypatch.setattr(journal_module, "COMPACT_MIN_BYTES", 100)
+    document = PieceTable()
+    journal = EditJournal(None, lambda: document, str(tmp_path))
+    for _ in range(20):
+        document.insert(0, "x" * 10)
+        journal.record_insert(0, "x" * 10)
+        flush(journal)
+        document.delete(0, 10)
+        journal.record_delete(0, 10)
+        flush(journal)
+    assert os.path.getsize(journal.path) < 200
+    assert replay_journal(journal.path)[1] == ""
+
+
+def test_replay_stops_at_a_cut_off_line(tmp_path):
+    """The edits before a line the crash cut short are still recovered"""
+    journal = EditJournal(None, PieceTable, str(tmp_path))
+    journal.record_insert(0, "kept")
+    flush(journal)
+    with open(journal.path, "a", encoding="utf-8") as file:
+        file.write('{"i": 0, "t": "lo')
+    assert replay_journal(journal.path)[1] == "kept"
+
+
+def test_recover_journals_skips_unusable_files(tmp_path):
+    """Only valid journals are recovered"""
+    (tmp_path / "bad.journal").write_text("not json\n")
+    (tmp_path / "other.txt").write_text("ignored")
+    journal = EditJournal(None, PieceTable, str(tmp_path))
+    journal.record_insert(0, "saved")
+    flush(journal)
+    orphan_path = str(tmp_path / "0123456789ab-left.journal")  # Its owner never locked anything - long gone
+    os.rename(journal.path, orphan_path)
+    assert recover_journals(str(tmp_path)) == [(orphan_path, None, "saved", False)]
+    assert recover_journals(str(tmp_path / "missing")) == []
+
+
+def test_journals_of_running_editors_are_not_recovered(tmp_path):
+    """Another editor's journals are left alone while it runs, and recovered once it has gone"""
+    script = ("import sys\n"
+              "from scribe.journal import EditJournal, JournalWriter\n"
+              "from scribe.piece_table import PieceTable\n"
+              "journal = EditJournal(None, PieceTable, sys.argv[1])\n"
+              "journal.record_insert(0, 'live')\n"
+              "writer = JournalWriter()\n"
+              "writer.submit(journal.take_writes())\n"
+              "writer.wait()\n"
+              "print(journal.path, flush=True)\n"
+              "sys.stdin.read()\n")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    writer = subprocess.Popen([sys.executable, "-c", script, str(tmp_path)], cwd=root, stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        live_path = writer.stdout.readline().strip()
+        own = EditJournal(None, PieceTable, str(tmp_path))
+        own.record_insert(0, "mine")
+        flush(own)
+        assert os.path.exists(live_path)
+        assert recover_journals(str(tmp_path)) == []
+    finally:
+        writer.stdin.close()
+        writer.wait()
+    assert recover_journals(str(tmp_path)) == [(live_path, None, "live", False)]
+
+
+def test_find_edit():
+    """The single edit found turns the old text into the new one"""
+    assert find_edit("abcdef", "abXef") == (2, 4, "X")
+    assert find_edit("aaa", "aaaa") == (3, 3, "a")
+    assert find_edit("", "new") == (0, 0, "new")
+    rng = random.Random(3)
+    for _ in range(500):
+        old = "".join(rng.choice("ab") for _ in range(rng.randrange(0, 12)))
+        new = "".join(rng.choice("ab") for _ in range(rng.randrange(0, 12)))
+        start, end, inserted = find_edit(old, new)
+        assert old[:start] + inserted + old[end:] == new
@@ -0,0 +1,83 @@
+"""Tests for scribe.long_lines"""
+
+import random
+
+import pytest
+
+from scribe.long_lines import MARKER_TAG, LongLineFilter, marker_text, pretty_print
+
+
+def load(text, chunk_sizes, limit):
+    """Feed text through a filter in chunks; returns the filter and the (text, tags) pieces inserted"""
+    line_filter = LongLineFilter(limit)
+    args = []
+    position = 0
+    for size in chunk_sizes:
+        args += line_filter.feed(text[position:position + size])
+        position += size
+    assert position >= len(text)
+    args += line_filter.finish()
+    return line_filter, list(zip(args[0::2], args[1::2]))
+
+
+def shown_and_restored(line_filter, pieces):
+    """Return the text the tab shows, and the text with every marker replaced by what it hides"""
+    shown = []
+    restored = []
+    for text, tags in pieces:
+        shown.append(text)
+        if MARKER_TAG in tags:
+            key = int(tags[1].rsplit("_", 1)[1])
+            restored.append(line_filter.hidden[key][0])
+        else:
+            restored.append(text)
+    return "".join(shown), "".join(restored)
+
+
+def test_short_lines_pass_through_untouched():
+    """Chunks without a long line are inserted as they are"""
+    line_filter, pieces = load("short\nlines\n", [3, 100], limit=10)
+    assert pieces == [("sho", ()), ("rt\nlines\n", ())]
+    assert not line_filter.truncated
+
+
+def test_long_line_is_cut_with_a_marker():
+    """Only the first limit characters of a long line are shown, followed by a tagged marker"""
+    line_filter, pieces = load("ab\n" + "x" * 25 + "\nend", [100], limit=10)
+    shown, restored = shown_and_restored(line_filter, pieces)
+    assert shown == "ab\n" + "x" * 10 + marker_text(15) + "\nend"
+    assert restored == "ab\n" + "x" * 25 + "\nend"
+    assert line_filter.truncated
+    assert (marker_text(15), (MARKER_TAG, "long_line_0")) in pieces
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_random_chunks_keep_every_character(seed):
+    """However the chunks split the lines, no shown line exceeds the limit and nothing is lost"""
+    rng = random.Random(seed)
+    text = "\n".join("y" * rng.choice([0, 3, 9, 10, 11, 40]) for _ in range(rng.randrange(1, 20)))
+    sizes = [rng.randrange(1, 15) for _ in range(len(text) + 1)]
+    line_filter, pieces = load(text, sizes, limit=10)
+    shown, restored = shown_and_restored(line_filter, pieces)
+    assert restored == text
+    for line in shown.split("\n"):
+        assert len(line.split("  [...")[0]) <= 10
+
+
+def test_take_shows_the_rest_a_slice_at_a_time():
+    """take returns the next part of a cut line and how much is still hidden"""
+    line_filter, _ = load("z" * 30, [30], limit=10)
+    assert line_filter.take(0, 8) == ("z" * 8, 12)
+    assert line_filter.take(0, 100) == ("z" * 12, 0)
+    assert line_filter.take(0, 5) == ("", 0)
+
+
+def test_pretty_print():
+    """JSON and XML are laid out one element per line; anything else is refused"""
+    assert pretty_print('{"a": [1, "é"]}') == ("JSON", '{\n  "a": [\n    1,\n    "é"\n  ]\n}\n')
+    kind, text = pretty_print("<a><b>x</b><c/></a>")
+    assert kind == "XML"
+    assert text.splitlines()[1:] == ["<a>", "  <b>x</b>", "  <c/>", "</a>"]
+    for bad in ("plain text", "{broken", "<a><b></a>"):
+        with pytest.raises(ValueError):
+            pretty_print(bad)
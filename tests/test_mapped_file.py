@@ -0,0 +1,114 @@
+"""Tests for scribe.mapped_file"""
+
+import random
+import re
+
+import pytest
+
+from scribe import mapped_file
+from scribe.mapped_file import MappedFile
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    """Index every 16 bytes, so lines cross many block boundaries"""
+    monkeypatch.setattr(mapped_file, "INDEX_BLOCK_SIZE", 16)
+
+
+def random_text(seed):
+    """Return text of random lines, some empty and some longer than a block"""
+    rng = random.Random(seed)
+    lines = ["x" * rng.choice([0, 1, 5, 15, 16, 17, 40]) for _ in range(rng.randrange(1, 60))]
+    return "\n".join(lines) + rng.choice(["", "\n"])
+
+
+def open_mapped(tmp_path, data):
+    """Write data to a file and return it mapped and fully indexed"""
+    path = tmp_path / "big.log"
+    path.write_bytes(data)
+    mapped = MappedFile(str(path))
+    mapped.start()
+    mapped._thread.join()
+    return mapped
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_lines_across_block_boundaries(tmp_path, small_blocks, seed):
+    """Line starts, line numbers and windows of lines match the text, wherever the blocks split it"""
+    text = random_text(seed)
+    lines = text.split("\n")
+    mapped = open_mapped(tmp_path, text.encode("utf-8"))
+    try:
+        assert mapped.index_complete and mapped.index_progress() == 1.0
+        assert mapped.line_count() == len(lines)
+        offset = 0
+        for number, line in enumerate(lines, 1):
+            assert mapped.line_start(number) == offset
+            offset += len(line) + 1
+        for offset in range(len(text)):
+            assert mapped.offset_to_line(offset) == text.count("\n", 0, offset) + 1
+        for first in range(1, len(lines) + 1):
+            for count in (1, 3, len(lines)):
+                window = lines[first - 1:first - 1 + count]
+                if first - 1 + count >= len(lines) and len(window) > 1 and window[-1] == "":
+                    window.pop()  # The empty line after a final newline is the widget's own last line
+                assert mapped.read_lines(first, count) == "\n".join(window)
+    finally:
+        mapped.close()
+
+
+def test_partial_index(tmp_path, small_blocks):
+    """While indexing, lines past the indexed blocks are unknown and windows end at the last whole line"""
+    text = "".join(f"line {number:02}\n" for number in range(1, 21))  # 8 bytes a line, 2 lines a block
+    mapped = open_mapped(tmp_path, text.encode("utf-8"))
+    try:
+        mapped.block_lines = mapped.block_lines[:4]  # As if only 3 blocks (48 bytes, 6 lines) were counted
+        mapped.index_complete = False
+        assert mapped.line_count() == 7
+        assert mapped.line_start(6) == 40
+        assert mapped.line_start(8) is None
+        assert mapped.offset_to_line(100) is None
+        assert mapped.read_lines(5, 10) == "line 05\nline 06"  # Stops at the end of the indexed part
+        assert mapped.read_lines(30, 1) == ""
+        assert 0 < mapped.index_progress() < 1
+    finally:
+        mapped.close()
+
+
+def test_window_size_is_bounded(tmp_path, small_blocks, monkeypatch):
+    """A window never decodes more than MAX_WINDOW_BYTES"""
+    monkeypatch.setattr(mapped_file, "MAX_WINDOW_BYTES", 10)
+    mapped = open_mapped(tmp_path, b"a" * 100 + b"\nb\n")
+    try:
+        assert mapped.read_lines(1, 2) == "a" * 10
+    finally:
+        mapped.close()
+
+
+def test_crlf_encoding_and_search(tmp_path):
+    """Windows are decoded with the file's encoding and CRLF folded; search returns byte offsets"""
+    data = "café\r\nsecond café\r\n".encode("cp1252")
+    path = tmp_path / "big.log"
+    path.write_bytes(data)
+    mapped = MappedFile(str(path), encoding="cp1252")
+    mapped.start()
+    mapped._thread.join()
+    try:
+        assert mapped.read_lines(1, 2) == "café\nsecond café"
+        start, end = mapped.search(re.compile("café".encode("cp1252")), 1)
+        assert (start, end) == (13, 17)
+        assert mapped.decode_range(start, end) == "café"
+        assert mapped.search(re.compile(b"missing")) is None
+    finally:
+        mapped.close()
+
+
+def test_empty_file(tmp_path):
+    """An empty file has one empty line and needs no index"""
+    mapped = open_mapped(tmp_path, b"")
+    try:
+        assert mapped.index_complete
+        assert mapped.line_count() == 1
+        assert mapped.read_lines(1, 10) == ""
+    finally:
+        mapped.close()
@@ -0,0 +1,98 @@
+"""Tests for scribe.piece_table"""
+
+import random
+
+from scribe.piece_table import ADD_BUFFER_LIMIT, PieceTable
+
+
+def check(document, text):
+    """Compare every query of a document with the same query on a plain string"""
+    assert document.get_text() == text
+    assert len(document) == len(text)
+    lines = text.split("\n")
+    assert document.line_count() == len(lines)
+    offset = 0
+    for number, line in enumerate(lines, 1):
+        assert document.line_start(number) == offset
+        assert document.line_length(number) == len(line)
+        offset += len(line) + 1
+    for offset in range(len(text) + 1):
+        line = text.count("\n", 0, offset) + 1
+        column = offset - (text.rfind("\n", 0, offset) + 1)
+        assert document.line_of(offset) == line
+        assert document.offset_to_index(offset) == f"{line}.{column}"
+        assert document.index_to_offset(f"{line}.{column}") == offset
+
+
+def test_empty_document():
+    """An empty document has one empty line"""
+    document = PieceTable()
+    check(document, "")
+    assert list(document.iter_chunks()) == []
+
+
+def test_insert_and_delete():
+    """Edits anywhere in the text, including across pieces"""
+    document = PieceTable("hello\nworld")
+    document.insert(5, ",")
+    document.insert(0, ">> ")
+    document.insert(len(document), "\n")
+    check(document, ">> hello,\nworld\n")
+    document.delete(2, 12)
+    check(document, ">>rld\n")
+    document.delete(0, len(document))
+    check(document, "")
+
+
+def test_offsets_are_clamped():
+    """Offsets and indices past either end are clamped to the document"""
+    document = PieceTable("ab\ncd")
+    document.insert(100, "!")
+    document.delete(-5, 1)
+    check(document, "b\ncd!")
+    assert document.index_to_offset("1.99") == 1
+    assert document.index_to_offset("9.0") == len(document)
+
+
+def test_snapshot_does_not_see_later_edits():
+    """A snapshot keeps the text it was taken with, even after typing into a shared buffer"""
+    document = PieceTable("abc")
+    document.insert(3, "d")
+    snapshot = document.snapshot()
+    document.insert(4, "e\nf")  # Extends the buffer the snapshot's last piece lives in
+    document.delete(0, 2)
+    assert snapshot.get_text() == "abcd"
+    assert snapshot.line_count() == 1
+    check(document, "cde\nf")
+
+
+def test_iter_chunks_range():
+    """A range of the text comes back piece by piece and joins up to the slice"""
+    document = PieceTable("0123456789")
+    document.insert(5, "abc")
+    document.insert(ADD_BUFFER_LIMIT, "x" * ADD_BUFFER_LIMIT)  # Too big to share a buffer
+    text = document.get_text()
+    for start, end in [(0, 3), (2, 9), (4, 8), (7, 13), (0, len(text))]:
+        assert "".join(document.iter_chunks(start, end)) == text[start:end]
+        assert document.get_text(start, end) == text[start:end]
+
+
+def test_random_edits_match_a_string():
+    """Thousands of random edits give the same text and line answers as a string"""
+    rng = random.Random(42)
+    document = PieceTable("start\n")
+    text = "start\n"
+    for step in range(2000):
+        if text and rng.random() < 0.4:
+            start = rng.randrange(len(text))
+            end = min(len(text), start + rng.randrange(1, 20))
+            document.delete(start, end)
+            text = text[:start] + text[end:]
+        else:
+            offset = rng.randrange(len(text) + 1)
+            insert = "".join(rng.choice("ab\n") for _ in range(rng.randrange(1, 12)))
+            document.insert(offset, insert)
+            text = text[:offset] + insert + text[offset:]
+        if step % 400 == 0:
+            check(document, text)
+    check(document, text)
@@ -0,0 +1,85 @@
+"""Tests for scribe.profiler"""
+
+import json
+import tkinter
+import types
+
+from scribe.profiler import BUCKET_LIMITS_MS, HandlerStats, Profiler, describe_callback, unwrap_callback
+
+
+def on_key(event=None):
+    """A handler to record"""
+
+
+class Widget:
+    """Just enough of a widget for tkinter.Misc.after to register its callback"""
+
+    def __init__(self):
+        self.registered = None
+        self.tk = types.SimpleNamespace(call=lambda *args: "after#1")
+
+    def _register(self, func):
+        self.registered = func
+        return "callit"
+
+    def handle(self):
+        """A bound method to record"""
+
+
+def test_unwrap_callback_sees_through_after_and_bound_methods():
+    """The function inside tkinter's after() wrapper, and the function behind a bound method, are found"""
+    widget = Widget()
+    tkinter.Misc.after(widget, 10, on_key)
+    assert widget.registered is not on_key
+    assert unwrap_callback(widget.registered) is on_key
+    assert unwrap_callback(widget.handle) is Widget.handle
+    assert unwrap_callback(on_key) is on_key
+
+
+def test_describe_callback():
+    """Functions are named by their qualified name, lambdas by where they are defined"""
+    assert describe_callback(on_key) == "on_key"
+    handler = lambda event: None  # noqa: E731
+    assert describe_callback(handler).startswith("test_describe_callback.<locals>.<lambda> (test_profiler.py:")
+    assert describe_callback(print) == "print"
+
+
+def test_percentile_is_the_top_of_its_bucket():
+    """Percentiles are read off the histogram and never exceed the slowest call"""
+    stats = HandlerStats("h")
+    for duration in [0.05] * 90 + [3] * 9 + [5000]:
+        stats.add(duration)
+    assert stats.count == 100 and stats.max_ms == 5000
+    assert stats.percentile(0.5) == BUCKET_LIMITS_MS[0]
+    assert stats.percentile(0.95) == 4
+    assert stats.percentile(1.0) == 5000  # The open-ended bucket reports the maximum
+    assert abs(stats.mean_ms - (90 * 0.05 + 27 + 5000) / 100) < 1e-9
+    single = HandlerStats("one")
+    single.add(0.3)
+    assert single.percentile(0.99) == 0.3  # Capped at the slowest call, not the bucket top of 0.5
+    assert HandlerStats("none").percentile(0.5) == 0.0
+
+
+def test_profiler_records_handlers_stalls_and_traces(tmp_path):
+    """Calls are grouped by handler, stalls blame the slowest recent handler, and ignored callbacks are skipped"""
+    profiler = Profiler()
+    widget = Widget()
+    profiler.ignore(widget.handle)
+    profiler.record(on_key, 1.000, 1.002)
+    profiler.record(on_key, 1.010, 1.050)
+    profiler.record(widget.handle, 1.060, 1.070)
+    profiler.record_stall(1.000, 1.100)
+    profiler.record_stall(1.200, 1.300)
+    stats = profiler.summary()
+    assert [entry.name for entry in stats] == ["on_key"]
+    assert stats[0].count == 2 and abs(stats[0].max_ms - 40) < 1e-6
+    assert [culprit for _, _, culprit in profiler.stalls] == ["on_key", "(outside Python handlers)"]
+
+    path = tmp_path / "trace.json"
+    profiler.export_chrome_trace(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+    handler_events = [event for event in events if event.get("cat") == "handler"]
+    assert [(event["ts"], event["dur"]) for event in handler_events] == [(0.0, 2000.0), (10000.0, 40000.0)]
+    assert sum(1 for event in events if event.get("cat") == "stall") == 2
+    profiler.reset()
+    assert profiler.summary() == [] and profiler.origin is None
@@ -0,0 +1,92 @@
+"""Tests for scribe.saver"""
+
+import gzip
+import os
+
+import pytest
+
+from scribe.saver import atomic_write, find_unencodable
+
+
+def test_atomic_write_writes_chunks_and_returns_size(tmp_path):
+    """The chunks end up in the file, and the size on disk is returned"""
+    path = tmp_path / "out.txt"
+    size = atomic_write(str(path), ["one\n", "two\n"], newline="\n")
+    assert path.read_bytes() == b"one\ntwo\n"
+    assert size == 8
+
+
+def test_atomic_write_replaces_existing_file_and_keeps_mode(tmp_path):
+    """An existing file is replaced whole and keeps its permissions"""
+    path = tmp_path / "out.txt"
+    path.write_text("old contents that are longer")
+    os.chmod(path, 0o640)
+    atomic_write(str(path), ["new"], newline="\n")
+    assert path.read_text() == "new"
+    assert os.stat(path).st_mode & 0o777 == 0o640
+
+
+def test_atomic_write_newline(tmp_path):
+    """Each \\n is written as the newline asked for"""
+    path = tmp_path / "out.txt"
+    atomic_write(str(path), ["a\nb\n"], newline="\r\n")
+    assert path.read_bytes() == b"a\r\nb\r\n"
+
+
+def test_atomic_write_encoding_writes_one_byte_order_mark(tmp_path):
+    """A BOM encoding starts the file with a single mark, however many chunks there are"""
+    path = tmp_path / "out.txt"
+    atomic_write(str(path), ["ab", "cd"], encoding="utf-16")
+    assert path.read_bytes().decode("utf-16") == "abcd"
+    assert path.read_bytes().count(b"\xff\xfe") == 1
+
+
+def test_atomic_write_compression(tmp_path):
+    """Compressed files are compressed on the way to disk"""
+    path = tmp_path / "out.txt.gz"
+    atomic_write(str(path), ["x" * 1000], compression="gzip")
+    assert gzip.decompress(path.read_bytes()) == b"x" * 1000
+
+
+def test_atomic_write_failure_leaves_original_and_no_temp_file(tmp_path):
+    """If writing fails, the original file is untouched and the temp file is removed"""
+    path = tmp_path / "out.txt"
+    path.write_text("original")
+
+    def chunks():
+        yield "partial"
+        raise RuntimeError("disk on fire")
+
+    with pytest.raises(RuntimeError):
+        atomic_write(str(path), chunks(), newline="\n")
+    assert path.read_text() == "original"
+    assert os.listdir(tmp_path) == ["out.txt"]
+
+
+def test_atomic_write_unencodable_text_raises_and_keeps_original(tmp_path):
+    """Text the encoding can't store fails the save without touching the file"""
+    path = tmp_path / "out.txt"
+    path.write_bytes(b"caf\xe9")
+    with pytest.raises(UnicodeEncodeError):
+        atomic_write(str(path), ["café ☃"], encoding="latin-1", newline="\n")
+    assert path.read_bytes() == b"caf\xe9"
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="needs symlinks")
+def test_atomic_write_through_symlink_replaces_target(tmp_path):
+    """Saving a symlink replaces the file it points at and keeps the link"""
+    target = tmp_path / "target.txt"
+    target.write_text("old")
+    link = tmp_path / "link.txt"
+    os.symlink(target, link)
+    atomic_write(str(link), ["new"], newline="\n")
+    assert os.path.islink(link)
+    assert target.read_text() == "new"
+
+
+def test_find_unencodable():
+    """The offset of the first character the encoding can't store, counted across chunks"""
+    assert find_unencodable(["abc", "déf"], "latin-1") is None
+    assert find_unencodable(["abc", "d☃f"], "latin-1") == 4
+    assert find_unencodable(["☃"], "cp1252") == 0
+    assert find_unencodable([], "ascii") is None
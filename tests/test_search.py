@@ -0,0 +1,118 @@
+"""Tests for scribe.search"""
+
+import re
+
+import pytest
+
+from scribe.search import (LineIndex, SearchSnapshot, compile_pattern, find_all, group_replacements,
+                           matches_between, plan_replacements)
+
+
+def apply(text, edits):
+    """Apply sorted (start, end, new_text) edits to text"""
+    for start, end, new_text in reversed(edits):
+        text = text[:start] + new_text + text[end:]
+    return text
+
+
+def test_compile_pattern_plain_text_is_escaped():
+    """Without regex the query is literal text"""
+    assert find_all(compile_pattern("a.b"), "axb a.b") == [(4, 7)]
+
+
+def test_compile_pattern_case():
+    """Case is ignored unless case_sensitive is set"""
+    text = "foo Foo FOO"
+    assert len(find_all(compile_pattern("foo"), text)) == 3
+    assert find_all(compile_pattern("foo", case_sensitive=True), text) == [(0, 3)]
+
+
+def test_compile_pattern_whole_word():
+    """Whole word skips matches inside words, even for queries that start with a symbol"""
+    assert find_all(compile_pattern("cat", whole_word=True), "cat concat cat_ cat.") == [(0, 3), (16, 19)]
+    assert find_all(compile_pattern("$x", whole_word=True), "$x $xy a$x") == [(0, 2)]
+
+
+def test_compile_pattern_multiline_anchors():
+    """^ and $ match at every line"""
+    assert find_all(compile_pattern("^b", regex=True), "a\nb\nb") == [(2, 3), (4, 5)]
+
+
+def test_compile_pattern_bytes():
+    """Bytes queries give bytes patterns, for memory-mapped files"""
+    pattern = compile_pattern(b"x+", regex=True, whole_word=True)
+    assert pattern.search(b"a xx b").span() == (2, 4)
+
+
+def test_compile_pattern_invalid_regex():
+    """An invalid regex raises re.error"""
+    with pytest.raises(re.error):
+        compile_pattern("(", regex=True)
+
+
+def test_find_all_skips_empty_matches_and_honors_range():
+    """Empty matches are never reported, and only matches inside start..end count"""
+    pattern = compile_pattern("x*", regex=True)
+    assert find_all(pattern, "axxbx") == [(1, 3), (4, 5)]
+    assert find_all(pattern, "axxbx", 3) == [(4, 5)]
+    assert find_all(pattern, "axxbx", 0, 2) == [(1, 2)]
+
+
+def test_line_index_round_trip():
+    """Offsets and Tk indices convert both ways"""
+    text = "ab\n\ncde\n"
+    index = LineIndex(text)
+    assert index.line_count() == 4
+    for offset in range(len(text) + 1):
+        assert index.to_offset(index.to_index(offset)) == offset
+    assert index.to_index(3) == "2.0"
+    assert index.to_index(5) == "3.1"
+    assert index.line_of(4) == 3
+
+
+def test_search_snapshot_builds_line_index_lazily():
+    """The line index is only built when it is asked for, and then kept"""
+    snapshot = SearchSnapshot("a\nb", 7)
+    assert snapshot._line_index is None
+    assert snapshot.line_index is snapshot.line_index
+    assert snapshot.generation == 7
+
+
+def test_matches_between():
+    """Matches overlapping the range are returned, including one running into it"""
+    matches = [(0, 2), (5, 10), (12, 13), (20, 21)]
+    assert matches_between(matches, 6, 13) == [(5, 10), (12, 13)]
+    assert matches_between(matches, 10, 12) == []
+    assert matches_between(matches, 0, 100) == matches
+
+
+def test_plan_replacements_plain_and_groups():
+    """Plain replacements are literal; with expand, groups are substituted"""
+    pattern = compile_pattern(r"(\w+)@(\w+)", regex=True)
+    text = "a@b c@d"
+    assert apply(text, plan_replacements(pattern, text, r"\2@\1", expand=True)) == "b@a d@c"
+    assert apply(text, plan_replacements(pattern, text, r"\2", expand=False)) == r"\2 \2"
+
+
+def test_plan_replacements_matches_case_when_asked():
+    """A case-sensitive pattern leaves other cases alone"""
+    pattern = compile_pattern("foo", case_sensitive=True)
+    text = "foo Foo FOO foo"
+    assert apply(text, plan_replacements(pattern, text, "bar")) == "bar Foo FOO bar"
+
+
+def test_plan_replacements_skips_empty_matches_and_honors_range():
+    """Empty matches are not replaced, and nothing outside start..end is"""
+    pattern = compile_pattern("x*", regex=True)
+    text = "xaxbx"
+    assert apply(text, plan_replacements(pattern, text, "-", start=1, end=4)) == "xa-bx"
+
+
+def test_group_replacements_gives_the_same_text():
+    """Merging nearby edits changes the number of edits, never the result"""
+    text = "one two one " * 50 + " " * 1000 + "one"
+    pattern = compile_pattern("one")
+    edits = plan_replacements(pattern, text, "1")
+    grouped = group_replacements(edits, text)
+    assert len(grouped) == 2
+    assert apply(text, grouped) == apply(text, edits) == text.replace("one", "1")
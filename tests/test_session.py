@@ -0,0 +1,38 @@
+"""Tests for scribe.session"""
+
+import json
+
+from scribe.session import SESSION_VERSION, load_session, save_session
+
+
+def test_round_trip(tmp_path):
+    """A saved session loads back with its tabs, active tab and settings"""
+    path = tmp_path / "config" / "session.json"
+    tabs = [{"path": "/a.py", "cursor": "3.4", "yview": 0.5}, {"path": "/b.txt", "cursor": "1.0", "yview": 0.0}]
+    state = {"tabs": tabs, "active": 1, "font_size": 14, "theme": "Dark"}
+    save_session(state, str(path))
+    assert load_session(str(path)) == dict(state, version=SESSION_VERSION)
+
+
+def test_missing_damaged_and_other_versions(tmp_path):
+    """No file, unreadable JSON and other versions all mean no session"""
+    path = tmp_path / "session.json"
+    assert load_session(str(path)) is None
+    path.write_text("{not json")
+    assert load_session(str(path)) is None
+    path.write_text(json.dumps({"version": SESSION_VERSION + 1, "tabs": []}))
+    assert load_session(str(path)) is None
+    path.write_text(json.dumps([1, 2]))
+    assert load_session(str(path)) is None
+
+
+def test_damaged_entries_are_skipped_or_defaulted(tmp_path):
+    """Bad tab entries are dropped, bad cursors and scroll positions reset, and a bad active index ignored"""
+    path = tmp_path / "session.json"
+    path.write_text(json.dumps({"version": SESSION_VERSION, "active": 5, "tabs": [
+        "not a tab", {"cursor": "2.0"}, {"path": 7},
+        {"path": "/kept.py", "cursor": 12, "yview": "top"},
+    ]}))
+    state = load_session(str(path))
+    assert state["tabs"] == [{"path": "/kept.py", "cursor": "1.0", "yview": 0.0}]
+    assert state["active"] is None
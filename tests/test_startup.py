@@ -0,0 +1,55 @@
+"""Tests for scribe.startup"""
+
+import json
+import sys
+
+from scribe.startup import REPORT_PREFIX, LazyModule, StartupTimer, parse_importtime, run_startup_report
+
+
+def test_parse_importtime():
+    """Module names are stripped of their nesting indent, and the header and other lines are skipped"""
+    lines = ["import time: self [us] | cumulative | imported package\n",
+             "import time:       120 |        120 |   _io\n",
+             "import time:      2048 |       4096 | tkinter\n",
+             "Traceback (most recent call last):\n",
+             "import time: garbled\n"]
+    assert parse_importtime(lines) == [("_io", 120, 120), ("tkinter", 2048, 4096)]
+
+
+def test_lazy_module_imports_on_first_use():
+    """Nothing is imported until an attribute is read"""
+    module = LazyModule("colorsys")
+    assert module._module is None
+    assert module.rgb_to_hsv(1, 0, 0) == (0, 1, 1)
+    assert module._module is sys.modules["colorsys"]
+
+
+def test_startup_timer_emits_marks(capsys):
+    """Marks are in order, measured from the start, and written as one prefixed JSON line"""
+    timer = StartupTimer(0.0)
+    timer.mark("imports")
+    timer.mark("window")
+    assert [phase for phase, _ in timer.marks] == ["imports", "window"]
+    assert 0 < timer.marks[0][1] <= timer.marks[1][1]
+    timer.emit()
+    line = capsys.readouterr().err
+    assert line.startswith(REPORT_PREFIX) and line.endswith("\n")
+    assert json.loads(line[len(REPORT_PREFIX):]) == [list(mark) for mark in timer.marks]
+
+
+def test_run_startup_report(tmp_path, capsys):
+    """The child's marks and imports end up in the JSON report; a child that never gets ready gives 2"""
+    script = tmp_path / "editor.py"
+    script.write_text("import sys, json\n"
+                      f"sys.stderr.write({REPORT_PREFIX!r} + json.dumps([['imports', 5.0], ['ready', 9.5]]) + '\\n')\n"
+                      "sys.stderr.write('a real warning\\n')\n")
+    output = tmp_path / "report.json"
+    assert run_startup_report(str(script), [], output=str(output)) in (0, 1)  # 1 only on a very slow machine
+    report = json.loads(output.read_text())
+    assert report["phases_ms"] == {"imports": 5.0, "ready": 9.5}
+    assert "json" in report["imports_us"]
+    assert "a real warning" in capsys.readouterr().err
+
+    script.write_text("raise SystemExit(3)\n")
+    assert run_startup_report(str(script), []) == 2
+    assert "exited before it was ready" in capsys.readouterr().err
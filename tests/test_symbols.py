@@ -0,0 +1,131 @@
+"""Tests for scribe.symbols"""
+
+import ast
+import json
+import os
+import subprocess
+import sys
+
+from scribe import symbols as symbols_module
+from scribe.symbols import (SymbolIndexer, fuzzy_filter, fuzzy_score, scan_symbols, split_blocks,
+                            symbols_from_tree)
+
+SOURCE = '''import os
+
+
+@decorator
+class Shape:
+    """A shape"""
+
+    def area(self):
+        def helper():
+            pass
+        return helper()
+
+    async def load(self):
+        pass
+
+
+if os.name == "nt":
+    def windows_only():
+        pass
+
+
+def find_by_size(size):
+    return size
+'''
+
+EXPECTED = [
+    [5, 0, "class", "Shape", ""],
+    [8, 1, "method", "area", "Shape"],
+    [9, 2, "function", "helper", "Shape.area"],
+    [13, 1, "method", "load", "Shape"],
+    [18, 0, "function", "windows_only", ""],
+    [22, 0, "function", "find_by_size", ""],
+]
+
+
+def test_symbols_from_tree():
+    """Classes, methods, nested functions and definitions inside if blocks, with their containers"""
+    assert symbols_from_tree(ast.parse(SOURCE)) == EXPECTED
+
+
+def test_split_blocks_keeps_decorators_with_their_definition():
+    """Blocks start at top-level definitions and join back into the source"""
+    blocks = split_blocks(SOURCE)
+    assert "".join(text for _, text in blocks) == SOURCE
+    assert [first_line for first_line, _ in blocks] == [1, 4, 22]
+    assert blocks[1][1].startswith("@decorator\nclass Shape")
+    assert split_blocks("") == [(1, "")]
+
+
+def test_scan_symbols_for_broken_text():
+    """The line scan finds definitions and their nesting without parsing"""
+    source = "class A:\n    def f(self:\n        pass\ndef g(\n"
+    assert scan_symbols(source, 10) == [[10, 0, "class", "A", ""], [11, 1, "method", "f", "A"],
+                                        [13, 0, "function", "g", ""]]
+
+
+def test_index_text_matches_a_full_parse_and_reuses_blocks(monkeypatch):
+    """Incremental indexing gives the full parse's symbols, and only changed blocks are parsed again"""
+    indexer = SymbolIndexer()
+    assert indexer.index_text("a.py", SOURCE) == EXPECTED
+    parsed = []
+    real_parse = ast.parse
+    monkeypatch.setattr(symbols_module.ast, "parse", lambda text: parsed.append(text) or real_parse(text))
+    edited = SOURCE.replace("return size", "return size * 2\n\n\ndef extra():\n    pass")
+    assert indexer.index_text("a.py", edited) == symbols_from_tree(real_parse(edited))
+    assert len(parsed) == 2  # The last block was split in two; the others were reused
+
+
+def test_index_text_with_a_syntax_error_keeps_the_other_blocks_exact():
+    """A block being typed falls back to the line scan; the rest keep their parsed symbols"""
+    broken = SOURCE.replace("def find_by_size(size):", "def find_by_size(size")
+    symbols = SymbolIndexer().index_text("a.py", broken)
+    assert symbols[:-1] == EXPECTED[:-1]
+    assert symbols[-1] == [22, 0, "function", "find_by_size", ""]
+
+
+def test_index_text_when_a_def_sits_inside_a_string():
+    """A split in the middle of a string falls back to parsing the whole file"""
+    source = 'text = """\ndef fake():\n"""\n\ndef real():\n    pass\n'
+    assert SymbolIndexer().index_text("a.py", source) == [[5, 0, "function", "real", ""]]
+
+
+def test_index_file_caches_by_size_and_mtime(tmp_path):
+    """An unchanged file is not read again; a changed one is"""
+    path = tmp_path / "m.py"
+    path.write_text("def one():\n    pass\n")
+    indexer = SymbolIndexer()
+    first = indexer.index_file(str(path))
+    assert indexer.index_file(str(path)) is first
+    path.write_text("def one():\n    pass\n\n\ndef two():\n    pass\n")
+    os.utime(path, ns=(1, 1))
+    assert [symbol[3] for symbol in indexer.index_file(str(path))] == ["one", "two"]
+
+
+def test_fuzzy_score_and_filter():
+    """Word starts and runs score higher; names rank above matches across the container"""
+    assert fuzzy_score("fbs", "find_by_size") > fuzzy_score("fbs", "fabulous")
+    assert fuzzy_score("xyz", "find_by_size") is None
+    symbols = [[1, 0, "function", "fabulous", ""], [2, 0, "function", "find_by_size", ""],
+               [3, 1, "method", "size", "Shape"], [4, 1, "method", "__init__", "Shape"]]
+    assert [symbol[3] for symbol in fuzzy_filter("fbs", symbols)] == ["find_by_size", "fabulous"]
+    assert [symbol[3] for symbol in fuzzy_filter("shapesize", symbols)] == ["size"]
+    assert fuzzy_filter("", symbols, limit=2) == symbols[:2]
+
+
+def test_helper_process(tmp_path):
+    """The helper answers one JSON line per request, including errors"""
+    path = tmp_path / "m.py"
+    path.write_text("class C:\n    pass\n")
+    requests = [{"id": 1, "path": str(path)}, {"id": 2, "path": "x.py", "text": "def f():\n    pass\n"},
+                {"id": 3, "path": str(tmp_path / "missing.py")}]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-m", "scribe.symbols"], cwd=root, capture_output=True, text=True,
+                            input="".join(json.dumps(request) + "\n" for request in requests), check=True).stdout
+    replies = [json.loads(line) for line in output.splitlines()]
+    assert [reply["id"] for reply in replies] == [1, 2, 3]
+    assert replies[0]["symbols"] == [[1, 0, "class", "C", ""]]
+    assert replies[1]["symbols"] == [[1, 0, "function", "f", ""]]
+    assert "error" in replies[2]
@@ -0,0 +1,163 @@
+"""Tests for scribe.undo"""
+
+import os
+import random
+
+from scribe import owner
+from scribe.undo import UndoHistory, meta_path, remove_stale_stores
+
+
+class Buffer:
+    """A string with an undo history, edited the way the editor's change tracker records edits"""
+
+    def __init__(self, history, text=""):
+        self.history = history
+        self.text = text
+
+    def edit(self, offset, length, inserted=""):
+        """Replace length characters at offset with inserted"""
+        removed = self.text[offset:offset + length]
+        self.text = self.text[:offset] + inserted + self.text[offset + length:]
+        self.history.record(offset, removed, inserted)
+
+    def type(self, offset, text):
+        """Type text one character at a time"""
+        for position, char in enumerate(text, offset):
+            self.edit(position, 0, char)
+
+    def apply(self, replacements):
+        """Apply undo or redo replacements; returns False if there were none"""
+        if replacements is None:
+            return False
+        for start, end, text in replacements:
+            self.text = self.text[:start] + text + self.text[end:]
+        return True
+
+    def undo(self):
+        return self.apply(self.history.undo())
+
+    def redo(self):
+        return self.apply(self.history.redo())
+
+
+def test_typing_is_undone_a_word_at_a_time(tmp_path):
+    """Typing runs become one step per word, the space after a word included"""
+    buffer = Buffer(UndoHistory(10000, str(tmp_path)))
+    buffer.type(0, "hello big world")
+    assert buffer.undo() and buffer.text == "hello big "
+    assert buffer.undo() and buffer.text == "hello "
+    assert buffer.undo() and buffer.text == ""
+    assert not buffer.undo()
+    assert buffer.redo() and buffer.redo() and buffer.text == "hello big "
+
+
+def test_backspace_and_delete_runs(tmp_path):
+    """Backspace and Delete key runs are one step per word too"""
+    buffer = Buffer(UndoHistory(10000, str(tmp_path)), "one two three")
+    for offset in range(12, 7, -1):  # Backspace "three"
+        buffer.edit(offset, 1)
+    for _ in range(3):  # Delete key on "one"
+        buffer.edit(0, 1)
+    assert buffer.text == " two "
+    assert buffer.undo() and buffer.text == "one two "
+    assert buffer.undo() and buffer.text == "one two three"
+
+
+def test_newlines_and_pastes_are_steps_of_their_own(tmp_path):
+    """Enter and multi-character inserts don't join a typing run"""
+    buffer = Buffer(UndoHistory(10000, str(tmp_path)))
+    buffer.type(0, "ab")
+    buffer.edit(2, 0, "\n")
+    buffer.edit(3, 0, "pasted")
+    assert buffer.undo() and buffer.text == "ab\n"
+    assert buffer.undo() and buffer.text == "ab"
+
+
+def test_group_is_one_step_and_new_edits_clear_redo(tmp_path):
+    """Replace All's edits undo together, and an edit after undo ends the redo chain"""
+    history = UndoHistory(10000, str(tmp_path))
+    buffer = Buffer(history, "a-a-a")
+    history.begin_group()
+    for offset in (4, 2, 0):
+        buffer.edit(offset, 1, "bb")
+    history.end_group()
+    assert buffer.text == "bb-bb-bb"
+    assert buffer.undo() and buffer.text == "a-a-a"
+    assert history.can_redo()
+    buffer.edit(0, 0, "x")
+    assert not history.can_redo()
+    history.begin_group()
+    history.end_group()
+    assert buffer.undo() and buffer.text == "a-a-a"  # The empty group left no step behind
+
+
+def test_disabled_history_records_nothing(tmp_path):
+    """Edits made while the history is disabled (loading a file) can't be undone"""
+    history = UndoHistory(10000, str(tmp_path))
+    history.enabled = False
+    Buffer(history).edit(0, 0, "loaded")
+    assert not history.can_undo()
+
+
+def test_spilled_steps_are_undone_from_disk(tmp_path):
+    """Steps past the budget move to the store and come back in order"""
+    rng = random.Random(5)
+    history = UndoHistory(200, str(tmp_path))
+    buffer = Buffer(history)
+    texts = [buffer.text]
+    for _ in range(100):
+        if buffer.text and rng.random() < 0.3:
+            buffer.edit(rng.randrange(len(buffer.text)), rng.randrange(1, 10))
+        else:
+            buffer.edit(rng.randrange(len(buffer.text) + 1), 0, "word%d " % rng.randrange(1000))
+        history.separator()
+        texts.append(buffer.text)
+    assert history.memory <= 200
+    assert history.store_path and os.path.exists(history.store_path)
+    for expected in reversed(texts[:-1]):
+        assert buffer.undo() and buffer.text == expected
+    assert not history.can_undo()
+
+
+def test_save_and_restore(tmp_path):
+    """A history saved at exit is taken over while the file is unchanged, and refused after it changed"""
+    path = tmp_path / "doc.txt"
+    history = UndoHistory(10000, str(tmp_path / "undo"))
+    buffer = Buffer(history)
+    buffer.edit(0, 0, "first ")
+    buffer.edit(6, 0, "second")
+    path.write_text(buffer.text)
+    history.save(str(path))
+    assert os.path.exists(meta_path(str(path), str(tmp_path / "undo")))
+
+    restored = UndoHistory(10000, str(tmp_path / "undo"))
+    assert restored.restore(str(path))
+    assert os.path.basename(restored.store_path).startswith(owner.OWNER_ID + "-")  # Taken over by this editor
+    buffer = Buffer(restored, path.read_text())
+    assert buffer.undo() and buffer.text == "first "
+    assert buffer.undo() and buffer.text == ""
+    restored.discard()
+
+    history = UndoHistory(10000, str(tmp_path / "undo"))
+    Buffer(history).edit(0, 0, "x")
+    path.write_text("x")
+    history.save(str(path))
+    path.write_text("changed elsewhere")
+    assert not UndoHistory(10000, str(tmp_path / "undo")).restore(str(path))
+    assert [name for name in os.listdir(tmp_path / "undo") if not name.endswith(".lock")] == []  # Store removed
+
+
+def test_remove_stale_stores(tmp_path):
+    """Only stores of editors no longer running that no saved history refers to are deleted"""
+    live = owner._try_lock(str(tmp_path / "aaaaaaaaaaaa.lock"))  # Another editor, still running
+    names = ["orphan.undo", "kept.undo", "0123456789ab-gone.undo", "aaaaaaaaaaaa-live.undo",
+             owner.owned_name(".undo")]
+    for name in names:
+        (tmp_path / name).write_bytes(b"x")
+    (tmp_path / "meta.json").write_text('{"store": "kept.undo"}')
+    try:
+        remove_stale_stores(str(tmp_path))
+    finally:
+        live.close()
+    assert sorted(os.listdir(tmp_path)) == sorted(["kept.undo", "aaaaaaaaaaaa.lock", "aaaaaaaaaaaa-live.undo",
+                                                   names[-1], "meta.json"])